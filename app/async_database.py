@@ -0,0 +1,41 @@
+"""
+Async database configuration
+asyncpg engine and session dependency used alongside the sync `get_db`
+"""
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncIterator
+import os
+
+
+def get_async_database_url() -> str:
+    """DATABASE_URL (or POSTGRES_* variables) rewritten for the asyncpg driver"""
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        db_host = os.getenv("POSTGRES_HOST", "localhost")
+        db_port = os.getenv("POSTGRES_PORT", "5432")
+        db_name = os.getenv("POSTGRES_DB", "nanny_match")
+        db_user = os.getenv("POSTGRES_USER", "app")
+        db_password = os.getenv("POSTGRES_PASSWORD", "app")
+        url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+async_engine = create_async_engine(
+    get_async_database_url(),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    pool_pre_ping=True,
+)
+
+# expire_on_commit=False: attributes must stay readable after commit without lazy IO
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding an AsyncSession"""
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -2,18 +2,25 @@
 FastAPI Main Application
 Modular structure with routers and services
 """
-from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Optional, Any
+from typing import Optional
 import logging
 from datetime import datetime
 
 # Import routers
-from .routers import onboarding, auth, dev
+from .routers import onboarding, auth, dev, reference, batch
 from .database import get_db, create_tables
+from .responses import FastJSONResponse
+from .services.otp_dispatch import otp_dispatcher
+from .services.pagination import COUNT_PATTERN, InvalidCursorError, content_range
+from .services.response_cache import (
+    get_generation, install_write_invalidation, response_cache_key, store_response, table_response_cache
+)
+from .services.table_registry import build_registry, get_table
+from .services.table_service import TableQueryError, TableService
 
 # Configure logging
 logging.basicConfig(
@@ -27,7 +34,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
-app = FastAPI(title="Nanny Match FastAPI", version="0.2.0")
+app = FastAPI(title="Nanny Match FastAPI", version="0.2.0", default_response_class=FastJSONResponse)
 
 # Request logging middleware
 @app.middleware("http")
@@ -48,11 +55,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Content-Range"],
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(onboarding.router)
+app.include_router(reference.router)
+app.include_router(batch.router)
 app.include_router(dev.router)
 
 # ===== Basic Endpoints =====
@@ -77,93 +87,96 @@ async def health_check():
 
 # ===== Generic Table Endpoint =====
 
+# Query parameters of list_rows that are not column filters
+TABLE_QUERY_PARAMS = {"select", "limit", "order_by", "cursor", "format", "count"}
+
 @app.get("/api/v1/{table_name}")
 async def list_rows(
+    request: Request,
     table_name: str,
     db: Session = Depends(get_db),
     select: Optional[str] = None,
     limit: int = Query(100, ge=1, le=1000),
     order_by: Optional[str] = None,
-    **filters: Any
+    cursor: Optional[str] = None,
+    export_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    count: str = Query("none", pattern=COUNT_PATTERN)
 ):
-    """Generic endpoint for table operations (fallback for unmapped tables)"""
-    # Import models here to avoid circular imports
-    from .models import (
-        Profile, UserRole, ProfilePhoto, Nanny, NannyService, NannyEducation, 
-        NannyLanguage, NannyAgeExperience, Certificate, SavedParent, Parent, 
-        ParentChild, ParentRequirement, SavedNanny, Booking, Review
-    )
-    
-    # Map table names to models
-    table_map = {
-        "profiles": Profile,
-        "user_roles": UserRole,
-        "profile_photos": ProfilePhoto,
-        "nannies": Nanny,
-        "nanny_services": NannyService,
-        "nanny_education": NannyEducation,
-        "nanny_languages": NannyLanguage,
-        "nanny_age_experience": NannyAgeExperience,
-        "certificates": Certificate,
-        "saved_parents": SavedParent,
-        "parents": Parent,
-        "parent_children": ParentChild,
-        "parent_requirements": ParentRequirement,
-        "saved_nannies": SavedNanny,
-        "bookings": Booking,
-        "reviews": Review,
-    }
-    
-    if table_name not in table_map:
+    """
+    Generic endpoint for table operations (fallback for unmapped tables).
+    `select=col1,col2` fetches only those columns; unknown names are a 400.
+    Foreign-key linked tables can be embedded, e.g.
+    `/api/v1/nannies?select=*,nanny_services(*),profiles(first_name)`.
+    Any other query parameter is a filter, e.g. `hours=gte.2&status=in.(new,paid)`
+    (see TableService.parse_filters).
+    Pass `cursor` (empty for the first page) to page with keyset cursors; the
+    response is then `{"data": [...], "next_cursor": ...}`.
+    `count=exact|estimated` reports the total in `Content-Range` (`0-99/3573`).
+    Tables with a cache TTL in the registry serve repeated identical requests
+    from the response cache (X-Cache header) until the TTL or a write.
+    `format=ndjson|csv` streams the whole (filtered) table instead; `limit`
+    does not apply there.
+    """
+    info = get_table(table_name)
+    if info is None:
         raise HTTPException(status_code=404, detail=f"Table {table_name} not found")
     
-    model = table_map[table_name]
-    query = db.query(model)
+    # Opted-in near-static tables: identical requests are answered from memory
+    cache_key = None
+    if info.cache_ttl and not export_format and "(" not in (select or ""):
+        cache_key = response_cache_key(table_name, [
+            *((key, value) for key, value in request.query_params.multi_items() if key not in TABLE_QUERY_PARAMS),
+            ("select", select or "*"), ("order_by", order_by or ""), ("limit", str(limit)),
+            ("cursor", cursor), ("count", count)
+        ])
+        found, cached = table_response_cache.get(cache_key)
+        if found:
+            body, range_header = cached
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={"Content-Range": range_header, "X-Cache": "HIT"}
+            )
+        generation = get_generation(table_name)
     
-    # Apply filters
-    for key, value in filters.items():
-        if "__" in key:
-            column, operator = key.split("__", 1)
-            if hasattr(model, column):
-                if operator == "eq":
-                    query = query.filter(getattr(model, column) == value)
-                elif operator == "in":
-                    if isinstance(value, str):
-                        values = value.split(",")
-                    else:
-                        values = value
-                    query = query.filter(getattr(model, column).in_(values))
+    service = TableService(db)
     
-    # Apply ordering
-    if order_by:
-        parts = order_by.split(":")
-        column = parts[0]
-        direction = parts[1] if len(parts) > 1 else "asc"
-        
-        if hasattr(model, column):
-            order_column = getattr(model, column)
-            if direction == "desc":
-                order_column = order_column.desc()
-            query = query.order_by(order_column)
+    # Validated up front: errors inside an export stream cannot become a 400
+    try:
+        conditions = service.parse_filters(info, [
+            (key, value) for key, value in request.query_params.multi_items()
+            if key not in TABLE_QUERY_PARAMS
+        ])
+        service.parse_select(info, select)
+    except TableQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Apply limit
-    query = query.limit(limit)
+    if export_format:
+        rows = service.stream_rows(info, conditions, order_by, export_format, select)
+        if export_format == "csv":
+            return StreamingResponse(
+                rows,
+                media_type="text/csv; charset=utf-8",
+                headers={"Content-Disposition": f"attachment; filename={table_name}.csv"}
+            )
+        return StreamingResponse(rows, media_type="application/x-ndjson")
     
-    # Execute query
-    results = query.all()
+    try:
+        data, next_cursor = service.list_rows(info, conditions, order_by, limit, cursor, select)
+    except (InvalidCursorError, TableQueryError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Convert to dict
-    data = []
-    for item in results:
-        item_dict = {}
-        for column in item.__table__.columns:
-            value = getattr(item, column.name)
-            if hasattr(value, 'isoformat'):  # datetime objects
-                value = value.isoformat()
-            item_dict[column.name] = value
-        data.append(item_dict)
+    total = service.count_rows(info, conditions, count)
+    range_header = content_range(None if cursor else 0, len(data), total)
+    payload = {"data": data, "next_cursor": next_cursor} if cursor is not None else data
     
-    return data
+    # Returned directly: rows are already plain values, no jsonable_encoder pass needed
+    rendered = FastJSONResponse(content=payload, headers={"Content-Range": range_header})
+    if cache_key is not None:
+        rendered.headers["X-Cache"] = "MISS"
+        store_response(cache_key, table_name, generation, (rendered.body, range_header),
+                       len(rendered.body), info.cache_ttl)
+    return rendered
 
 # ===== Error Handlers =====
 
@@ -190,10 +203,18 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Database initialization error: {str(e)}")
     
+    # Model registry for the generic table endpoint
+    registry = build_registry()
+    install_write_invalidation(name for name, info in registry.items() if info.cache_ttl)
+    
+    # Background OTP delivery
+    otp_dispatcher.start()
+    
     logger.info("✅ Application startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
     logger.info("🛑 Shutting down Nanny Match FastAPI application...")
+    await otp_dispatcher.stop()
     logger.info("✅ Application shutdown complete")
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+JSON response classes
+orjson-backed default response class with a stdlib fallback
+"""
+from fastapi.responses import JSONResponse
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+# JSON_ENCODER=json forces the stdlib encoder even when orjson is installed
+FAST_JSON = orjson is not None and os.getenv("JSON_ENCODER", "orjson").lower() != "json"
+
+if orjson is None:
+    logger.warning("⚠️ orjson is not installed, using the stdlib JSON encoder")
+
+
+def _default(value: Any) -> Any:
+    """Types neither encoder handles on its own (orjson also calls this for Decimal)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes; UUID, datetime, date, time and Decimal are handled natively"""
+    if FAST_JSON:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Application default response class.
+
+    Returned directly from an endpoint it also skips FastAPI's
+    jsonable_encoder pass, which is where most of the time goes for large
+    lists of plain dicts.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,32 +4,50 @@ Handles all auth-related API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from typing import Optional
 import logging
 
-from ..database import get_db
+from ..async_database import get_async_db
 from ..schemas import *
-from ..models import Profile
-from ..sms import send_otp_sms, verify_otp, get_sms_balance
-from ..auth_utils import hash_password, verify_password
+from ..models import Profile, UserRole
+from ..sms import get_sms_balance
 from ..jwt_utils import create_access_token, create_refresh_token, verify_token, get_user_id_from_token
+from ..services.otp_dispatch import OtpQueueFull, otp_dispatcher
+from ..services.otp_store import OtpRateLimited, otp_store
+from ..services.password_hasher import MAX_PASSWORD_BYTES, PasswordHasherBusy, PasswordTooLong, password_hasher
+from ..services.auth_cache import (
+    Principal, get_principal, install_profile_invalidation, invalidate_principals, principal_version,
+    store_principal, verified_user_id
+)
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
+# ORM changes to profiles drop the cached principal of that user
+install_profile_invalidation(Profile)
+
 # ===== Dependencies =====
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Profile:
-    """Get current authenticated user"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Get current authenticated user.
+    
+    Token signatures are verified once per token (verified-token cache,
+    entries expire with the token). Profiles are served from the principal
+    cache (short TTL, dropped on password or profile changes) as frozen
+    Principal snapshots, not ORM instances: write through queries instead.
+    """
     try:
         token = credentials.credentials
-        user_id = get_user_id_from_token(token)
+        user_id = verified_user_id(token, get_user_id_from_token)
         
         if not user_id:
             raise HTTPException(
@@ -38,7 +56,12 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user = db.query(Profile).filter(Profile.user_id == user_id).first()
+        found, principal = get_principal(user_id)
+        if found:
+            return principal
+        
+        version = principal_version(user_id)
+        user = (await db.execute(select(Profile).where(Profile.user_id == user_id))).scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,7 +69,9 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return user
+        principal = Principal.from_profile(user)
+        store_principal(user_id, version, principal)
+        return principal
     except Exception as e:
         logger.error(f"Authentication error: {str(e)}")
         raise HTTPException(
@@ -55,10 +80,78 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """
+    Claims-only authentication: user id from a valid bearer token, no database
+    lookup. For routes that only need the id (the profile may since have been
+    deleted; use get_current_user where that matters).
+    """
+    user_id = verified_user_id(credentials.credentials, get_user_id_from_token)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return str(user_id)
+
+async def get_optional_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[str]:
+    """Get user id from a bearer token if one was sent (no database lookup)"""
+    if credentials is None:
+        return None
+    
+    user_id = verified_user_id(credentials.credentials, get_user_id_from_token)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return str(user_id)
+
+async def require_admin(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Allow only users with the admin role"""
+    is_admin = (await db.execute(
+        select(UserRole.user_id).where(
+            UserRole.user_id == current_user.user_id,
+            UserRole.role == "admin"
+        ).limit(1)
+    )).first()
+    
+    if not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостатньо прав")
+    
+    return current_user
+
+def _hasher_busy() -> HTTPException:
+    """Password hashing queue is full: ask the client to retry instead of queueing forever"""
+    logger.warning("⚠️ Password hashing queue full, rejecting request")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервер перевантажений, спробуйте пізніше",
+        headers={"Retry-After": "1"},
+    )
+
+def _password_too_long() -> HTTPException:
+    """bcrypt cannot hash the password: reject it before it reaches the hashing pool"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Пароль задовгий (максимум {MAX_PASSWORD_BYTES} байти)",
+    )
+
 # ===== Auth Endpoints =====
 
 @router.get("/me", response_model=ProfileResponse)
-async def get_current_user_profile(current_user: Profile = Depends(get_current_user)):
+async def get_current_user_profile(current_user: Principal = Depends(get_current_user)):
     """Get current user profile"""
     return ProfileResponse(
         user_id=current_user.user_id,
@@ -71,23 +164,43 @@ async def get_current_user_profile(current_user: Profile = Depends(get_current_u
 
 @router.post("/send-otp", response_model=OTPResponse)
 async def send_otp(request: OTPRequest):
-    """Send OTP to phone number"""
+    """
+    Send OTP to phone number.
+    
+    The SMS is queued and delivered in the background (with retries), so the
+    response does not wait for the SMS provider. Sends per phone are limited
+    by the OTP store (429 with Retry-After). The queue slot is reserved before
+    a code is issued, so a full queue (503) leaves the previous code and the
+    send window untouched.
+    """
     try:
-        logger.info(f"📱 Sending OTP to {request.phone} for {request.purpose}")
+        logger.info(f"📱 Queueing OTP to {request.phone} for {request.purpose}")
         
-        # Send OTP via SMS
-        success = send_otp_sms(request.phone, request.purpose)
-        
-        if success:
-            logger.info(f"✅ OTP sent successfully to {request.phone}")
-            return OTPResponse(
-                success=True,
-                message=f"OTP надіслано на номер {request.phone}"
+        with otp_dispatcher.reserve() as slot:
+            code = await otp_store.issue(
+                request.phone, request.purpose, generate=not otp_dispatcher.provider.issues_codes
             )
-        else:
-            logger.error(f"❌ Failed to send OTP to {request.phone}")
-            raise HTTPException(status_code=500, detail="Не вдалося надіслати OTP")
+            slot.enqueue(request.phone, request.purpose, code)
+        
+        return OTPResponse(
+            success=True,
+            message=f"OTP надіслано на номер {request.phone}"
+        )
             
+    except OtpRateLimited as e:
+        logger.warning(f"⚠️ OTP send limit reached for {request.phone}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Забагато запитів коду, спробуйте через {e.retry_after} с",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except OtpQueueFull:
+        logger.warning(f"⚠️ OTP queue is full, rejecting OTP to {request.phone}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервіс SMS перевантажений, спробуйте пізніше",
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         logger.error(f"❌ Error sending OTP: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка сервера")
@@ -99,7 +212,9 @@ async def verify_otp_endpoint(request: OTPVerify):
         logger.info(f"🔐 Verifying OTP for {request.phone}")
         
         # Verify OTP
-        is_valid = verify_otp(request.phone, request.code, request.purpose)
+        is_valid = await otp_store.verify(
+            request.phone, request.purpose, request.code, check=otp_dispatcher.verify
+        )
         
         if is_valid:
             logger.info(f"✅ OTP verified successfully for {request.phone}")
@@ -118,7 +233,7 @@ async def verify_otp_endpoint(request: OTPVerify):
         raise HTTPException(status_code=500, detail="Помилка сервера")
 
 @router.post("/register")
-async def register_user(request: dict, db: Session = Depends(get_db)):
+async def register_user(request: dict, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
         phone = request.get('phone')
@@ -129,15 +244,15 @@ async def register_user(request: dict, db: Session = Depends(get_db)):
         logger.info(f"👤 Registering user: {phone}, role: {role}")
         
         # Check if user already exists
-        existing_user = db.query(Profile).filter(
-            (Profile.phone == phone) | (Profile.email == email)
-        ).first()
+        existing_user = (await db.execute(
+            select(Profile).where((Profile.phone == phone) | (Profile.email == email))
+        )).scalars().first()
         
         if existing_user:
             raise HTTPException(status_code=400, detail="Користувач вже існує")
         
-        # Hash password
-        hashed_password = hash_password(password)
+        # Hash password (off the event loop)
+        hashed_password = await password_hasher.hash(password)
         
         # Create user profile
         import uuid
@@ -155,14 +270,13 @@ async def register_user(request: dict, db: Session = Depends(get_db)):
         db.add(new_profile)
         
         # Add user role
-        from ..models import UserRole
         user_role = UserRole(
             user_id=user_id,
             role=role
         )
         db.add(user_role)
         
-        db.commit()
+        await db.commit()
         
         # Generate tokens
         access_token = create_access_token(data={"sub": user_id})
@@ -185,13 +299,17 @@ async def register_user(request: dict, db: Session = Depends(get_db)):
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    except PasswordTooLong:
+        raise _password_too_long()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Registration error: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка реєстрації")
 
 @router.post("/login")
-async def login_user(request: dict, db: Session = Depends(get_db)):
+async def login_user(request: dict, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
     try:
         email = request.get('email')
@@ -200,11 +318,21 @@ async def login_user(request: dict, db: Session = Depends(get_db)):
         logger.info(f"🔑 Login attempt for: {email}")
         
         # Find user
-        user = db.query(Profile).filter(Profile.email == email).first()
+        user = (await db.execute(select(Profile).where(Profile.email == email))).scalars().first()
+        
+        if not user:
+            raise HTTPException(status_code=401, detail="Невірні дані для входу")
         
-        if not user or not verify_password(password, user.password_hash):
+        is_valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+        if not is_valid:
             raise HTTPException(status_code=401, detail="Невірні дані для входу")
         
+        if new_hash:
+            # Stored hash uses an old cost or scheme: upgrade it transparently
+            user.password_hash = new_hash
+            await db.commit()
+            logger.info(f"🔁 Password rehashed for: {user.user_id}")
+        
         # Generate tokens
         access_token = create_access_token(data={"sub": user.user_id})
         refresh_token = create_refresh_token(data={"sub": user.user_id})
@@ -225,6 +353,8 @@ async def login_user(request: dict, db: Session = Depends(get_db)):
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     except Exception as e:
         logger.error(f"❌ Login error: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка входу")
@@ -232,23 +362,28 @@ async def login_user(request: dict, db: Session = Depends(get_db)):
 @router.post("/update-password", response_model=UpdatePasswordResponse)
 async def update_password(
     body: UpdatePasswordBody,
-    current_user: Profile = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user password"""
     try:
         logger.info(f"🔒 Updating password for user: {current_user.user_id}")
         
         # Verify current password
-        if not verify_password(body.current_password, current_user.password_hash):
+        if not await password_hasher.verify(body.current_password, current_user.password_hash):
             raise HTTPException(status_code=400, detail="Невірний поточний пароль")
         
         # Hash new password
-        new_password_hash = hash_password(body.new_password)
+        new_password_hash = await password_hasher.hash(body.new_password)
         
-        # Update password
-        current_user.password_hash = new_password_hash
-        db.commit()
+        # Update password (current_user is a read-only snapshot)
+        await db.execute(
+            update(Profile)
+            .where(Profile.user_id == current_user.user_id)
+            .values(password_hash=new_password_hash)
+        )
+        await db.commit()
+        invalidate_principals([current_user.user_id])
         
         logger.info(f"✅ Password updated successfully for user: {current_user.user_id}")
         
@@ -259,7 +394,11 @@ async def update_password(
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    except PasswordTooLong:
+        raise _password_too_long()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Password update error: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка оновлення паролю")
\ No newline at end of file
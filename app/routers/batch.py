@@ -0,0 +1,160 @@
+"""
+Batch endpoint router
+Runs several GET requests against the app in-process and returns all results at once
+"""
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlencode
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1", tags=["Batch"])
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+# Sub-requests in flight at once per batch (each may hold a pooled DB connection)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Outer request headers that do not describe a GET sub-request
+_SKIPPED_HEADERS = {b"content-length", b"content-type", b"transfer-encoding", b"expect"}
+# Sub-response headers worth returning to the client
+_RETURNED_HEADERS = ("content-type", "etag", "content-range", "cache-control", "x-cache")
+
+
+def _parse_item(index: int, item: Any) -> Tuple[str, str, str, List[Tuple[bytes, bytes]]]:
+    """Validate one sub-request: returns (id, path, query string, extra headers)"""
+    if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+        raise HTTPException(status_code=400, detail=f"Запит {index}: потрібен path")
+
+    if item.get("method", "GET").upper() != "GET":
+        raise HTTPException(status_code=400, detail=f"Запит {index}: підтримується лише GET")
+
+    path, _, query_string = item["path"].partition("?")
+    if not path.startswith("/") or path.rstrip("/") == router.prefix + "/batch":
+        raise HTTPException(status_code=400, detail=f"Запит {index}: недопустимий path")
+
+    query = item.get("query")
+    if isinstance(query, dict):
+        extra = urlencode(query, doseq=True)
+        query_string = f"{query_string}&{extra}" if query_string else extra
+
+    headers = [
+        (str(name).lower().encode("latin-1"), str(value).encode("latin-1"))
+        for name, value in (item.get("headers") or {}).items()
+    ]
+    return str(item.get("id", index)), path, query_string, headers
+
+
+async def _dispatch(
+    request: Request,
+    path: str,
+    query_string: str,
+    extra_headers: List[Tuple[bytes, bytes]]
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Call the application's ASGI stack directly for one GET (no network hop)"""
+    overridden = {name for name, _ in extra_headers}
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name not in _SKIPPED_HEADERS and name not in overridden
+    ] + extra_headers
+
+    scope = {
+        **{key: value for key, value in request.scope.items() if key in ("asgi", "http_version", "scheme", "server", "client", "root_path", "state")},
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": headers,
+    }
+
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    body = bytearray()
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                response_headers[name.decode("latin-1").lower()] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    try:
+        await request.app(scope, receive, send)
+    finally:
+        response_done.set()
+
+    return status, response_headers, bytes(body)
+
+
+def _decode_body(headers: Dict[str, str], body: bytes) -> Any:
+    if not body:
+        return None
+    if headers.get("content-type", "").startswith("application/json"):
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    return body.decode("utf-8", errors="replace")
+
+
+@router.post("/batch")
+async def run_batch(request: Request):
+    """
+    Run independent GET requests in one round trip.
+
+    Body: `{"requests": [{"id": "me", "path": "/api/v1/auth/me"},
+    {"id": "steps", "path": "/api/v1/onboarding_steps", "query": {"config_id": "..."}}]}`.
+    Sub-requests inherit the caller's headers (Authorization included), run
+    concurrently through the full middleware/dependency stack and are
+    returned in request order as `{"responses": [{"id", "status", "headers", "body"}]}`.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некоректний JSON")
+
+    items = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Потрібен непорожній список requests")
+    if len(items) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"Максимум {BATCH_MAX_REQUESTS} запитів у пакеті")
+
+    parsed = [_parse_item(index, item) for index, item in enumerate(items)]
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(item_id: str, path: str, query_string: str, headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                status, response_headers, body = await _dispatch(request, path, query_string, headers)
+            except Exception as e:
+                logger.error(f"❌ Batch sub-request {path} failed: {str(e)}")
+                return {"id": item_id, "status": 500, "headers": {}, "body": {"detail": "Internal server error"}}
+
+        return {
+            "id": item_id,
+            "status": status,
+            "headers": {name: response_headers[name] for name in _RETURNED_HEADERS if name in response_headers},
+            "body": _decode_body(response_headers, body)
+        }
+
+    responses = await asyncio.gather(*(run(*item) for item in parsed))
+    return {"responses": responses}
@@ -12,8 +12,15 @@ import subprocess
 import tempfile
 import logging
 from datetime import datetime
+from typing import Optional
 
 from ..database import get_db
+from ..services.onboarding_service import OnboardingService
+from ..services import auth_cache, response_cache
+from ..services.otp_dispatch import otp_dispatcher
+from ..services.otp_store import otp_store
+from ..services.password_hasher import password_hasher
+from ..services.reference_service import ReferenceService
 
 logger = logging.getLogger(__name__)
 
@@ -205,4 +212,95 @@ async def test_database_connection(db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=500,
             detail=f"Database connection test failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/onboarding-cache")
+async def get_onboarding_cache_stats():
+    """
+    Show onboarding metadata cache hit/miss counters - only available in development environment
+    """
+    check_dev_environment()
+    
+    return {
+        "status": "success",
+        "cache": OnboardingService.cache_stats(),
+        "reference_cache": ReferenceService.cache_stats()
+    }
+
+@router.post("/onboarding-cache/invalidate")
+async def invalidate_onboarding_cache(role: Optional[str] = None):
+    """
+    Drop cached onboarding metadata for a role (or all roles) - only available in development environment
+    """
+    check_dev_environment()
+    
+    removed = OnboardingService.invalidate_cache(role)
+    return {
+        "status": "success",
+        "role": role,
+        "removed_entries": removed
+    }
+
+@router.get("/table-cache")
+async def get_table_cache_stats():
+    """
+    Show generic table response cache hit ratio and size - only available in development environment
+    """
+    check_dev_environment()
+    
+    return {
+        "status": "success",
+        "cache": response_cache.cache_stats()
+    }
+
+@router.post("/table-cache/invalidate")
+async def invalidate_table_cache(table_name: str):
+    """
+    Drop cached responses of one generic table - only available in development environment
+    """
+    check_dev_environment()
+    
+    removed = response_cache.invalidate_tables([table_name])
+    return {
+        "status": "success",
+        "table_name": table_name,
+        "removed_entries": removed
+    }
+
+@router.get("/password-hasher")
+async def get_password_hasher_stats():
+    """
+    Show password hashing pool and queue counters - only available in development environment
+    """
+    check_dev_environment()
+    
+    return {
+        "status": "success",
+        "hasher": password_hasher.stats()
+    }
+
+@router.get("/otp-queue")
+async def get_otp_queue_stats():
+    """
+    Show OTP dispatch queue, delivery and OTP store counters - only available in development environment
+    """
+    check_dev_environment()
+    
+    return {
+        "status": "success",
+        "dispatcher": otp_dispatcher.stats(),
+        "store": otp_store.stats()
+    }
+
+@router.get("/auth-cache")
+async def get_auth_cache_stats():
+    """
+    Show verified-token and principal cache statistics - only available in development environment
+    """
+    check_dev_environment()
+    
+    return {
+        "status": "success",
+        "cache": auth_cache.cache_stats()
+    }
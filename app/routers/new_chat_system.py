@@ -8,11 +8,16 @@ from sqlalchemy import text
 import logging
 
 from ..core.database import get_db
+from ..services.serializers import UUID, serialize_rows
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["💰 Нова система чатів"])
 
+SIMPLE_NANNY_COLUMNS = (
+    ("user_id", UUID), ("first_name", None), ("last_name", None), ("age", None), ("city", None)
+)
+
 @router.get("/test-new-system")
 async def test_new_system():
     """Тестовий ендпоінт для перевірки роботи нової системи"""
@@ -60,15 +65,7 @@ async def get_simple_nannies(
         
         result = db.execute(text(nannies_sql), {"limit": limit})
         
-        nannies = []
-        for row in result.fetchall():
-            nannies.append({
-                "user_id": str(row.user_id),
-                "first_name": row.first_name,
-                "last_name": row.last_name,
-                "age": row.age,
-                "city": row.city
-            })
+        nannies = serialize_rows(SIMPLE_NANNY_COLUMNS, result.fetchall())
         
         return {
             "success": True,
@@ -2,76 +2,117 @@
 Onboarding endpoints router
 Handles all onboarding-related API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Optional
+from datetime import datetime
+from uuid import UUID
+import hashlib
 import logging
 
-from ..database import get_db
+from ..async_database import get_async_db
+from ..responses import FastJSONResponse
+from ..services.auth_cache import Principal
 from ..services.onboarding_service import OnboardingService
+from ..services.pagination import COUNT_PATTERN, InvalidCursorError, content_range
+from ..services.reference_service import ReferenceService
+from .auth import get_current_user, get_current_user_id, get_optional_user_id, require_admin
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["Onboarding"])
 
+# ===== HTTP caching helpers =====
+
+async def _metadata_etag(service: OnboardingService, request: Request, embed_options: bool = False) -> str:
+    """Strong ETag from the metadata version stamp plus the request path and query"""
+    stamp = await service.get_metadata_version()
+    if embed_options:
+        stamp += await ReferenceService(service.db).get_version()
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{stamp}|{request.url.path}|{query}".encode()).hexdigest()
+    return f'"{digest}"'
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    
+    return False
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def _not_modified_response(etag: str) -> Response:
+    response = Response(status_code=304)
+    _set_etag(response, etag)
+    return response
+
+def _render(response: Response, content: Any) -> FastJSONResponse:
+    """Render directly (skipping jsonable_encoder) and keep headers set on `response`"""
+    return FastJSONResponse(content=content, headers=dict(response.headers))
+
+def _set_count(response: Response, rows: int, count: str) -> None:
+    """Content-Range for the unpaged metadata lists (the total is the list length)"""
+    response.headers["Content-Range"] = content_range(0, rows, None if count == "none" else rows)
+
 # ===== Supabase-like API endpoints for onboarding tables =====
 
 @router.get("/onboarding_configs")
 async def get_onboarding_configs(
+    request: Request,
+    response: Response,
     target_role: str = Query(None),
     is_default: bool = Query(None),
     is_active: bool = Query(None),
-    db: Session = Depends(get_db)
+    count: str = Query("none", pattern=COUNT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding configurations with Supabase-like filtering"""
     try:
         service = OnboardingService(db)
-        return service.get_configs(target_role, is_default, is_active)
+        etag = await _metadata_etag(service, request)
+        if _is_not_modified(request, etag):
+            return _not_modified_response(etag)
+        
+        _set_etag(response, etag)
+        configs = await service.get_configs(target_role, is_default, is_active)
+        _set_count(response, len(configs), count)
+        return _render(response, configs)
     except Exception as e:
         logger.error(f"❌ Error fetching onboarding configs: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка сервера")
 
 @router.get("/onboarding_steps")
 async def get_onboarding_steps(
+    request: Request,
+    response: Response,
     config_id: str = Query(None),
     is_active: bool = Query(None),
     order_by: str = Query("step_number"),
-    db: Session = Depends(get_db)
+    count: str = Query("none", pattern=COUNT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding steps with Supabase-like filtering"""
     try:
-        query = "SELECT * FROM onboarding_steps WHERE 1=1"
-        params = {}
-        
-        if config_id is not None:
-            query += " AND config_id = :config_id"
-            params["config_id"] = config_id
-            
-        if is_active is not None:
-            query += " AND is_active = :is_active"
-            params["is_active"] = is_active
-            
-        if order_by:
-            query += f" ORDER BY {order_by}"
-        
-        result = db.execute(text(query), params).fetchall()
-        
-        steps = []
-        for row in result:
-            steps.append({
-                "id": str(row.id),
-                "config_id": str(row.config_id),
-                "step_number": row.step_number,
-                "step_key": row.step_key,
-                "title": row.title,
-                "description": row.description,
-                "is_required": row.is_required,
-                "is_active": row.is_active,
-                "created_at": row.created_at.isoformat() if row.created_at else None
-            })
+        service = OnboardingService(db)
+        etag = await _metadata_etag(service, request)
+        if _is_not_modified(request, etag):
+            return _not_modified_response(etag)
         
-        return steps
+        _set_etag(response, etag)
+        steps = await service.get_steps(config_id, is_active, order_by)
+        _set_count(response, len(steps), count)
+        return _render(response, steps)
         
     except Exception as e:
         logger.error(f"❌ Error fetching onboarding steps: {str(e)}")
@@ -79,100 +120,184 @@ async def get_onboarding_steps(
 
 @router.get("/onboarding_fields")
 async def get_onboarding_fields(
+    request: Request,
+    response: Response,
     step_id: str = Query(None),
     is_active: bool = Query(None),
     order_by: str = Query("field_order"),
-    db: Session = Depends(get_db)
+    embed_options: bool = Query(False),
+    count: str = Query("none", pattern=COUNT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding fields with Supabase-like filtering"""
     try:
-        query = "SELECT * FROM onboarding_fields WHERE 1=1"
-        params = {}
+        service = OnboardingService(db)
+        etag = await _metadata_etag(service, request, embed_options)
+        if _is_not_modified(request, etag):
+            return _not_modified_response(etag)
         
-        if step_id is not None:
-            # Handle both single step_id and array of step_ids
-            if "," in step_id:
-                step_ids = [s.strip() for s in step_id.split(",")]
-                placeholders = ",".join([f":step_id_{i}" for i in range(len(step_ids))])
-                query += f" AND step_id IN ({placeholders})"
-                for i, sid in enumerate(step_ids):
-                    params[f"step_id_{i}"] = sid
-            else:
-                query += " AND step_id = :step_id"
-                params["step_id"] = step_id
-            
-        if is_active is not None:
-            query += " AND is_active = :is_active"
-            params["is_active"] = is_active
-            
-        if order_by:
-            query += f" ORDER BY {order_by}"
+        _set_etag(response, etag)
         
-        result = db.execute(text(query), params).fetchall()
+        # Handle both single step_id and array of step_ids
+        if step_id is not None and "," in step_id:
+            step_ids = [s.strip() for s in step_id.split(",")]
+            fields = await service.get_fields(step_ids=step_ids, is_active=is_active, order_by=order_by)
+        else:
+            fields = await service.get_fields(step_id=step_id, is_active=is_active, order_by=order_by)
         
-        fields = []
-        for row in result:
-            fields.append({
-                "id": str(row.id),
-                "step_id": str(row.step_id),
-                "field_key": row.field_key,
-                "field_type": row.field_type,
-                "label": row.label,
-                "description": row.description,
-                "placeholder": row.placeholder,
-                "help_text": row.help_text,
-                "reference_category_code": row.reference_category_code,
-                "is_required": row.is_required,
-                "is_active": row.is_active,
-                "field_order": row.field_order,
-                "allow_custom_values": row.allow_custom_values,
-                "validation_rules": row.validation_rules,
-                "field_config": row.field_config,
-                "group_id": str(row.group_id) if row.group_id else None,
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "updated_at": row.updated_at.isoformat() if row.updated_at else None
-            })
+        if embed_options:
+            fields = await ReferenceService(db).embed_options(fields)
         
-        return fields
+        _set_count(response, len(fields), count)
+        return _render(response, fields)
         
     except Exception as e:
         logger.error(f"❌ Error fetching onboarding fields: {str(e)}")
         raise HTTPException(status_code=500, detail="Помилка сервера")
 
+# ===== Aggregated onboarding endpoints =====
+
+@router.get("/onboarding/tree/{role}")
+async def get_onboarding_tree(
+    role: str,
+    include_user_data: bool = Query(False),
+    user_id: Optional[str] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get config → steps → fields for a role in one request"""
+    if include_user_data and not user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    try:
+        service = OnboardingService(db)
+        tree = await service.get_onboarding_tree(role, user_id if include_user_data else None)
+    except Exception as e:
+        logger.error(f"❌ Error fetching onboarding tree: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка сервера")
+    
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Конфігурацію онбордингу не знайдено")
+    
+    return tree
+
+@router.post("/onboarding/user-data/batch")
+async def save_onboarding_user_data_batch(
+    request: dict,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Save all answers of a step (or a whole config) in one request"""
+    items = request.get("fields")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Поле 'fields' має бути непорожнім списком")
+    
+    try:
+        service = OnboardingService(db)
+        result = await service.save_user_data_batch(
+            str(current_user.user_id),
+            items,
+            config_id=request.get("config_id"),
+            step_key=request.get("step_key")
+        )
+    except Exception as e:
+        logger.error(f"❌ Error saving onboarding data batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка збереження даних")
+    
+    if not result["saved"]:
+        raise HTTPException(status_code=400, detail=result["errors"])
+    
+    return result
+
+@router.get("/onboarding/user-data")
+async def get_onboarding_user_data(
+    response: Response,
+    config_id: Optional[str] = Query(None),
+    updated_since: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    count: str = Query("none", pattern=COUNT_PATTERN),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the user's onboarding answers incrementally, page by page"""
+    try:
+        service = OnboardingService(db)
+        page = await service.get_user_data_page(
+            user_id,
+            config_id=config_id,
+            updated_since=updated_since,
+            cursor=cursor,
+            limit=limit
+        )
+        total = await service.count_user_data(user_id, config_id, updated_since, count)
+        response.headers["Content-Range"] = content_range(None if cursor else 0, len(page["data"]), total)
+        return page
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error fetching onboarding user data: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка сервера")
+
+@router.get("/onboarding/progress/{config_id}")
+async def get_onboarding_progress(
+    config_id: UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get how far the current user is in an onboarding config"""
+    try:
+        service = OnboardingService(db)
+        progress = await service.get_progress(user_id, str(config_id))
+    except Exception as e:
+        logger.error(f"❌ Error fetching onboarding progress: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка сервера")
+    
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Конфігурацію онбордингу не знайдено")
+    
+    return progress
+
+@router.get("/onboarding/progress")
+async def get_onboarding_progress_bulk(
+    user_ids: str = Query(..., description="Comma-separated user ids"),
+    config_id: Optional[UUID] = Query(None),
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get onboarding progress of many users (admin dashboards)"""
+    try:
+        ids = [str(UUID(user_id.strip())) for user_id in user_ids.split(",") if user_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Невірний ідентифікатор користувача")
+    if len(ids) > 1000:
+        raise HTTPException(status_code=400, detail="Максимум 1000 користувачів за запит")
+    
+    try:
+        service = OnboardingService(db)
+        return await service.get_progress_bulk(ids, str(config_id) if config_id else None)
+    except Exception as e:
+        logger.error(f"❌ Error fetching onboarding progress in bulk: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка сервера")
+
 # ===== Legacy onboarding endpoints =====
 
 @router.get("/onboarding/configs/{role}")
 async def get_onboarding_config_by_role(
     role: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding configuration for a specific role"""
     try:
-        query = text("""
-            SELECT * FROM onboarding_configs 
-            WHERE target_role = :role AND is_default = true AND is_active = true
-            ORDER BY created_at DESC
-            LIMIT 1
-        """)
-        
-        result = db.execute(query, {"role": role}).fetchone()
+        service = OnboardingService(db)
+        config = await service.get_config_by_role(role)
         
-        if not result:
-            logger.warning(f"No onboarding configuration found for role: {role}")
+        if not config:
             return []
         
-        config = {
-            "id": str(result.id),
-            "target_role": result.target_role,
-            "name": result.name,
-            "is_default": result.is_default,
-            "is_active": result.is_active,
-            "version": result.version,
-            "created_at": result.created_at.isoformat() if result.created_at else None,
-            "updated_at": result.updated_at.isoformat() if result.updated_at else None
-        }
-        
-        logger.info(f"✅ Found onboarding config for {role}: {config['name']}")
         return [config]  # Return as array to match frontend expectation
         
     except Exception as e:
@@ -182,36 +307,12 @@ async def get_onboarding_config_by_role(
 @router.get("/onboarding/steps/{role}")
 async def get_onboarding_steps_by_role(
     role: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding steps for a specific role"""
     try:
-        query = text("""
-            SELECT os.*, oc.name as config_name 
-            FROM onboarding_steps os
-            JOIN onboarding_configs oc ON os.config_id = oc.id
-            WHERE oc.target_role = :role AND os.is_active = true
-            ORDER BY os.step_number
-        """)
-        
-        result = db.execute(query, {"role": role}).fetchall()
-        
-        steps = []
-        for row in result:
-            steps.append({
-                "id": str(row.id),
-                "config_id": str(row.config_id),
-                "config_name": row.config_name,
-                "step_key": row.step_key,
-                "title": row.title,
-                "description": row.description,
-                "step_number": row.step_number,
-                "is_required": row.is_required,
-                "is_active": row.is_active,
-                "created_at": row.created_at.isoformat() if row.created_at else None
-            })
-        
-        return steps
+        service = OnboardingService(db)
+        return await service.get_steps_by_role(role)
         
     except Exception as e:
         logger.error(f"❌ Error fetching onboarding steps: {str(e)}")
@@ -220,43 +321,22 @@ async def get_onboarding_steps_by_role(
 @router.get("/onboarding/fields/{step_id}")
 async def get_onboarding_fields_by_step(
     step_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    embed_options: bool = Query(False),
+    count: str = Query("none", pattern=COUNT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get onboarding fields for a specific step"""
     try:
-        query = text("""
-            SELECT * FROM onboarding_fields 
-            WHERE step_id = :step_id AND is_active = true
-            ORDER BY field_order
-        """)
-        
-        result = db.execute(query, {"step_id": step_id}).fetchall()
+        service = OnboardingService(db)
+        fields = await service.get_fields(step_id=step_id, is_active=True)
         
-        fields = []
-        for row in result:
-            fields.append({
-                "id": str(row.id),
-                "step_id": str(row.step_id),
-                "group_id": str(row.group_id) if row.group_id else None,
-                "field_key": row.field_key,
-                "label": row.label,
-                "description": row.description,
-                "placeholder": row.placeholder,
-                "help_text": row.help_text,
-                "field_type": row.field_type,
-                "field_order": row.field_order,
-                "is_required": row.is_required,
-                "is_active": row.is_active,
-                "reference_category_code": row.reference_category_code,
-                "allow_custom_values": row.allow_custom_values,
-                "validation_rules": row.validation_rules,
-                "field_config": row.field_config,
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "updated_at": row.updated_at.isoformat() if row.updated_at else None
-            })
+        if embed_options:
+            fields = await ReferenceService(db).embed_options(fields)
         
-        return fields
+        _set_count(response, len(fields), count)
+        return _render(response, fields)
         
     except Exception as e:
         logger.error(f"❌ Error fetching onboarding fields: {str(e)}")
-        raise HTTPException(status_code=500, detail="Помилка сервера")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Помилка сервера")
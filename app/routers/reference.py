@@ -0,0 +1,32 @@
+"""
+Reference data endpoints router
+Handles reference categories used by onboarding fields
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from ..async_database import get_async_db
+from ..services.reference_service import ReferenceService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/reference", tags=["Reference"])
+
+
+@router.get("/resolve")
+async def resolve_reference_categories(
+    codes: str = Query(..., description="Comma-separated category codes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get options of many reference categories in one request"""
+    category_codes = [code.strip() for code in codes.split(",") if code.strip()]
+    if len(category_codes) > 100:
+        raise HTTPException(status_code=400, detail="Максимум 100 категорій за запит")
+    
+    try:
+        service = ReferenceService(db)
+        return await service.resolve_categories(category_codes)
+    except Exception as e:
+        logger.error(f"❌ Error resolving reference categories: {str(e)}")
+        raise HTTPException(status_code=500, detail="Помилка сервера")
@@ -0,0 +1,179 @@
+"""
+Authentication caches
+Verified access tokens and authenticated principals (read-only profile
+snapshots) kept between requests
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import base64
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+from .cache import TTLCache
+
+principal_cache = TTLCache(
+    "principals",
+    ttl_seconds=float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Entries are keyed by the token's SHA-256 and expire with the token (capped by the TTL)
+token_cache = TTLCache(
+    "tokens",
+    ttl_seconds=float(os.getenv("AUTH_TOKEN_CACHE_MAX_TTL", "900")),
+    max_entries=int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Profile versions: bumped on invalidation so a lookup racing an update is not cached.
+# Kept in bump order and pruned once older than the principal TTL: by then the lookups
+# they guard against are long finished and entries cached under them have aged out.
+_versions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+_versions_lock = threading.Lock()
+_version_counter = itertools.count(1)
+
+_installed = False
+
+
+def _token_expiry(token: str) -> Optional[float]:
+    """`exp` claim of a JWT whose signature has already been verified"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def verified_user_id(token: str, verify: Callable[[str], Any]) -> Any:
+    """
+    User id of an access token, verifying its signature once per token.
+
+    `verify` (get_user_id_from_token) runs on a miss; a successful result is
+    cached until the token's `exp`. Failed verifications and tokens without
+    `exp` are not cached.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    found, user_id = token_cache.get(key)
+    if found:
+        return user_id
+
+    user_id = verify(token)
+    if user_id:
+        expires = _token_expiry(token)
+        if expires is not None and expires > time.time():
+            token_cache.set(key, user_id, ttl_seconds=min(expires - time.time(), token_cache.ttl_seconds))
+    return user_id
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the profile columns routes use (shared between requests)"""
+    user_id: str
+    phone: Optional[str]
+    email: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    password_hash: Optional[str]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_profile(cls, profile: Any) -> "Principal":
+        return cls(
+            user_id=str(profile.user_id),
+            phone=profile.phone,
+            email=profile.email,
+            first_name=profile.first_name,
+            last_name=profile.last_name,
+            password_hash=profile.password_hash,
+            created_at=profile.created_at
+        )
+
+
+def principal_version(user_id: str) -> int:
+    """Current version of a user's cached principal (read before loading the profile)"""
+    entry = _versions.get(str(user_id))
+    return entry[0] if entry else 0
+
+
+def get_principal(user_id: str) -> Tuple[bool, Optional[Principal]]:
+    """Return (found, principal) for the current version of a user"""
+    user_id = str(user_id)
+    return principal_cache.get((user_id, principal_version(user_id)))
+
+
+def store_principal(user_id: str, version: int, principal: Principal) -> None:
+    """Cache a principal unless the user was invalidated since `version` was read"""
+    user_id = str(user_id)
+    with _versions_lock:
+        if principal_version(user_id) == version:
+            principal_cache.set((user_id, version), principal, tag=user_id)
+
+
+def _prune_versions(now: float) -> None:
+    """Drop version entries older than the principal TTL (oldest first)"""
+    horizon = now - principal_cache.ttl_seconds
+    while _versions and next(iter(_versions.values()))[1] < horizon:
+        _versions.popitem(last=False)
+
+
+def invalidate_principals(user_ids: Iterable[Any]) -> int:
+    """Drop cached principals (password change, profile update)"""
+    user_ids = {str(user_id) for user_id in user_ids}
+    now = time.monotonic()
+    with _versions_lock:
+        for user_id in user_ids:
+            # Globally unique versions: a pruned user falls back to 0, which no racing lookup holds
+            _versions[user_id] = (next(_version_counter), now)
+            _versions.move_to_end(user_id)
+        _prune_versions(now)
+        return principal_cache.invalidate(user_ids)
+
+
+def install_profile_invalidation(profile_model: Any) -> None:
+    """
+    Invalidate principals whenever a profile is changed through the ORM.
+
+    Changed profiles are collected on flush and invalidated after commit
+    (sync and async sessions alike). Raw SQL updates of `profiles` must call
+    invalidate_principals themselves.
+    """
+    global _installed
+    if _installed:
+        return
+
+    @event.listens_for(Session, "after_flush")
+    def _collect_profiles(session, flush_context):
+        changed = [obj for obj in (*session.dirty, *session.deleted) if isinstance(obj, profile_model)]
+        if changed:
+            session.info.setdefault("changed_principals", set()).update(
+                str(profile.user_id) for profile in changed
+            )
+
+    @event.listens_for(Session, "after_commit")
+    def _invalidate_on_commit(session):
+        changed = session.info.pop("changed_principals", None)
+        if changed:
+            invalidate_principals(changed)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard_on_rollback(session):
+        session.info.pop("changed_principals", None)
+
+    _installed = True
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit ratios of the token and principal caches"""
+    return {
+        "tokens": token_cache.stats(),
+        "principals": {**principal_cache.stats(), "tracked_versions": len(_versions)}
+    }
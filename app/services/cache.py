@@ -0,0 +1,102 @@
+"""
+In-process cache primitives
+Small thread-safe LRU/TTL cache shared by the services
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry TTL, tag invalidation and hit/miss counters.
+
+    `max_bytes` adds a size budget on top of `max_entries`: callers pass the
+    size of each value to `set` and least recently used entries are evicted
+    until both limits hold.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 300, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Optional[Hashable], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value); expired entries count as misses"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, _tag, size = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.size_bytes -= size
+            self.misses += 1
+            return False, None
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tag: Optional[Hashable] = None,
+        ttl_seconds: Optional[float] = None,
+        size: int = 0
+    ) -> None:
+        """Store a value; `tag` groups entries for `invalidate(tag)`, `size` counts towards max_bytes"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[3]
+            self._entries[key] = (time.monotonic() + ttl, value, tag, size)
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size_bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted[3]
+                self.evictions += 1
+
+    def invalidate(self, tags: Optional[Iterable[Hashable]] = None) -> int:
+        """Drop entries carrying any of `tags`, or everything when no tags given"""
+        with self._lock:
+            if tags is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self.size_bytes = 0
+                return removed
+            tags = set(tags)
+            stale = [key for key, (_, _, tag, _) in self._entries.items() if tag in tags]
+            for key in stale:
+                self.size_bytes -= self._entries.pop(key)[3]
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
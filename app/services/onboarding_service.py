@@ -2,21 +2,144 @@
 Onboarding business logic service
 Handles all onboarding-related business operations
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+from datetime import datetime
+import hashlib
+import json
 import logging
+import os
 import uuid
 
+from .cache import TTLCache
+from .onboarding_validation import ConfigValidator, OnboardingValidationError, coerce_answer, compile_field_validator
+from .pagination import EXACT_COUNT_BELOW, InvalidCursorError, decode_cursor, encode_cursor, plan_rows
+from .reference_service import ReferenceService
+from .serializers import ISO, UUID, get_serializer, serialize_rows
+
 logger = logging.getLogger(__name__)
 
+# Tag for cached entries that are not tied to a single role (e.g. fields by step_id)
+ANY_ROLE_TAG = "*"
+
+# Onboarding metadata only changes when a new config version is published
+onboarding_cache = TTLCache(
+    "onboarding",
+    ttl_seconds=float(os.getenv("ONBOARDING_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("ONBOARDING_CACHE_MAX_ENTRIES", "1024"))
+)
+
+# Answer columns of user_onboarding_data accepted from clients
+USER_DATA_VALUE_COLUMNS = (
+    "text_value", "number_value", "boolean_value", "date_value",
+    "time_value", "json_value", "custom_values"
+)
+
+def _answer_bind_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answer columns ready to bind: typed columns were converted by
+    coerce_answer, the jsonb columns are sent as JSON text.
+    """
+    values = {column: data.get(column) for column in USER_DATA_VALUE_COLUMNS}
+    
+    for column in ("json_value", "custom_values"):
+        if values[column] is not None:
+            values[column] = json.dumps(values[column], ensure_ascii=False)
+    
+    return values
+
+def _is_uuid(value: Any) -> bool:
+    """True when value is a UUID or its string form"""
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+# Row shapes of the onboarding queries (column, conversion)
+CONFIG_COLUMNS = (
+    ("id", UUID), ("target_role", None), ("name", None), ("is_default", None),
+    ("is_active", None), ("version", None), ("created_at", ISO), ("updated_at", ISO)
+)
+STEP_COLUMNS = (
+    ("id", UUID), ("config_id", UUID), ("step_number", None), ("step_key", None),
+    ("title", None), ("description", None), ("is_required", None), ("is_active", None),
+    ("created_at", ISO)
+)
+STEP_BY_ROLE_COLUMNS = (
+    ("id", UUID), ("config_id", UUID), ("config_name", None), ("step_key", None),
+    ("title", None), ("description", None), ("step_number", None), ("is_required", None),
+    ("is_active", None), ("created_at", ISO)
+)
+FIELD_COLUMNS = (
+    ("id", UUID), ("step_id", UUID), ("field_key", None), ("field_type", None),
+    ("label", None), ("description", None), ("placeholder", None), ("help_text", None),
+    ("reference_category_code", None), ("is_required", None), ("is_active", None),
+    ("field_order", None), ("allow_custom_values", None), ("validation_rules", None),
+    ("field_config", None), ("group_id", UUID), ("created_at", ISO), ("updated_at", ISO)
+)
+PROGRESS_COLUMNS = (
+    ("user_id", UUID), ("config_id", UUID), ("steps_total", None), ("steps_completed", None),
+    ("required_fields_total", None), ("required_fields_remaining", None), ("percent", None),
+    ("updated_at", ISO)
+)
+USER_DATA_COLUMNS = (
+    ("id", UUID), ("user_id", UUID), ("config_id", UUID), ("step_key", None),
+    ("field_key", None), ("text_value", None), ("number_value", None),
+    ("boolean_value", None), ("date_value", ISO), ("time_value", ISO),
+    ("json_value", None), ("custom_values", None), ("is_completed", None),
+    ("created_at", ISO), ("updated_at", ISO)
+)
+
 class OnboardingService:
     """Service class for onboarding operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_configs(
+    @staticmethod
+    def invalidate_cache(role: Optional[str] = None) -> int:
+        """Drop cached onboarding metadata (call after publishing a new config version)"""
+        if role is None:
+            removed = onboarding_cache.invalidate()
+        else:
+            removed = onboarding_cache.invalidate([role, ANY_ROLE_TAG])
+        logger.info(f"🧹 Onboarding cache invalidated (role={role}, removed={removed})")
+        return removed
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Hit/miss counters of the onboarding metadata cache"""
+        return onboarding_cache.stats()
+    
+    async def get_metadata_version(self) -> str:
+        """
+        Version stamp of all onboarding metadata (configs, steps, fields).
+        Changes whenever a config version is bumped or rows are added/updated.
+        
+        Not cached: the responses it guards are read fresh, so a cached stamp
+        would answer 304 for edits made since. Steps have no updated_at, so
+        they are stamped by a digest of their rows (a few dozen per config).
+        """
+        try:
+            row = (await self.db.execute(text("""
+                SELECT
+                    (SELECT COUNT(*) FROM onboarding_configs) AS configs_count,
+                    (SELECT COALESCE(SUM(version), 0) FROM onboarding_configs) AS configs_version,
+                    (SELECT MAX(updated_at) FROM onboarding_configs) AS configs_updated_at,
+                    (SELECT md5(COALESCE(string_agg(s::text, ',' ORDER BY s.id), ''))
+                     FROM onboarding_steps s) AS steps_digest,
+                    (SELECT COUNT(*) FROM onboarding_fields) AS fields_count,
+                    (SELECT MAX(updated_at) FROM onboarding_fields) AS fields_updated_at
+            """))).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Error fetching onboarding metadata version: {str(e)}")
+            raise
+        
+        return hashlib.sha1("|".join(str(value) for value in row).encode()).hexdigest()
+    
+    async def get_configs(
         self, 
         target_role: Optional[str] = None,
         is_default: Optional[bool] = None,
@@ -41,20 +164,9 @@ class OnboardingService:
                 
             query += " ORDER BY created_at DESC"
             
-            result = self.db.execute(text(query), params).fetchall()
-            
-            configs = []
-            for row in result:
-                configs.append({
-                    "id": str(row.id),
-                    "target_role": row.target_role,
-                    "name": row.name,
-                    "is_default": row.is_default,
-                    "is_active": row.is_active,
-                    "version": row.version,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "updated_at": row.updated_at.isoformat() if row.updated_at else None
-                })
+            result = (await self.db.execute(text(query), params)).fetchall()
+            
+            configs = serialize_rows(CONFIG_COLUMNS, result)
             
             return configs
             
@@ -62,7 +174,7 @@ class OnboardingService:
             logger.error(f"❌ Error fetching onboarding configs: {str(e)}")
             raise
     
-    def get_steps(
+    async def get_steps(
         self,
         config_id: Optional[str] = None,
         is_active: Optional[bool] = None,
@@ -84,21 +196,9 @@ class OnboardingService:
             if order_by:
                 query += f" ORDER BY {order_by}"
             
-            result = self.db.execute(text(query), params).fetchall()
-            
-            steps = []
-            for row in result:
-                steps.append({
-                    "id": str(row.id),
-                    "config_id": str(row.config_id),
-                    "step_number": row.step_number,
-                    "step_key": row.step_key,
-                    "title": row.title,
-                    "description": row.description,
-                    "is_required": row.is_required,
-                    "is_active": row.is_active,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
+            result = (await self.db.execute(text(query), params)).fetchall()
+            
+            steps = serialize_rows(STEP_COLUMNS, result)
             
             return steps
             
@@ -106,14 +206,31 @@ class OnboardingService:
             logger.error(f"❌ Error fetching onboarding steps: {str(e)}")
             raise
     
-    def get_fields(
+    async def get_fields(
         self,
         step_id: Optional[str] = None,
         step_ids: Optional[List[str]] = None,
         is_active: Optional[bool] = None,
         order_by: str = "field_order"
     ) -> List[Dict[str, Any]]:
-        """Get onboarding fields with filtering"""
+        """Get onboarding fields with filtering (served from the onboarding cache)"""
+        cache_key = ("fields", step_id, tuple(step_ids) if step_ids is not None else None, is_active, order_by)
+        found, fields = onboarding_cache.get(cache_key)
+        if found:
+            return fields
+        
+        fields = await self._fetch_fields(step_id, step_ids, is_active, order_by)
+        onboarding_cache.set(cache_key, fields, tag=ANY_ROLE_TAG)
+        return fields
+    
+    async def _fetch_fields(
+        self,
+        step_id: Optional[str],
+        step_ids: Optional[List[str]],
+        is_active: Optional[bool],
+        order_by: str
+    ) -> List[Dict[str, Any]]:
+        """Load onboarding fields from the database"""
         try:
             query = "SELECT * FROM onboarding_fields WHERE 1=1"
             params = {}
@@ -134,30 +251,9 @@ class OnboardingService:
             if order_by:
                 query += f" ORDER BY {order_by}"
             
-            result = self.db.execute(text(query), params).fetchall()
-            
-            fields = []
-            for row in result:
-                fields.append({
-                    "id": str(row.id),
-                    "step_id": str(row.step_id),
-                    "field_key": row.field_key,
-                    "field_type": row.field_type,
-                    "label": row.label,
-                    "description": row.description,
-                    "placeholder": row.placeholder,
-                    "help_text": row.help_text,
-                    "reference_category_code": row.reference_category_code,
-                    "is_required": row.is_required,
-                    "is_active": row.is_active,
-                    "field_order": row.field_order,
-                    "allow_custom_values": row.allow_custom_values,
-                    "validation_rules": row.validation_rules,
-                    "field_config": row.field_config,
-                    "group_id": str(row.group_id) if row.group_id else None,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "updated_at": row.updated_at.isoformat() if row.updated_at else None
-                })
+            result = (await self.db.execute(text(query), params)).fetchall()
+            
+            fields = serialize_rows(FIELD_COLUMNS, result)
             
             return fields
             
@@ -165,8 +261,19 @@ class OnboardingService:
             logger.error(f"❌ Error fetching onboarding fields: {str(e)}")
             raise
     
-    def get_config_by_role(self, role: str) -> Optional[Dict[str, Any]]:
-        """Get default active onboarding configuration for a specific role"""
+    async def get_config_by_role(self, role: str) -> Optional[Dict[str, Any]]:
+        """Get default active onboarding configuration for a specific role (cached)"""
+        cache_key = ("config", role)
+        found, config = onboarding_cache.get(cache_key)
+        if found:
+            return config
+        
+        config = await self._fetch_config_by_role(role)
+        onboarding_cache.set(cache_key, config, tag=role)
+        return config
+    
+    async def _fetch_config_by_role(self, role: str) -> Optional[Dict[str, Any]]:
+        """Load the default active onboarding configuration from the database"""
         try:
             query = text("""
                 SELECT * FROM onboarding_configs 
@@ -175,22 +282,13 @@ class OnboardingService:
                 LIMIT 1
             """)
             
-            result = self.db.execute(query, {"role": role}).fetchone()
+            result = (await self.db.execute(query, {"role": role})).fetchone()
             
             if not result:
                 logger.warning(f"No onboarding configuration found for role: {role}")
                 return None
             
-            config = {
-                "id": str(result.id),
-                "target_role": result.target_role,
-                "name": result.name,
-                "is_default": result.is_default,
-                "is_active": result.is_active,
-                "version": result.version,
-                "created_at": result.created_at.isoformat() if result.created_at else None,
-                "updated_at": result.updated_at.isoformat() if result.updated_at else None
-            }
+            config = get_serializer(CONFIG_COLUMNS)(result)
             
             logger.info(f"✅ Found onboarding config for {role}: {config['name']}")
             return config
@@ -199,8 +297,20 @@ class OnboardingService:
             logger.error(f"❌ Error fetching onboarding config by role: {str(e)}")
             raise
     
-    def get_steps_by_role(self, role: str) -> List[Dict[str, Any]]:
-        """Get onboarding steps for a specific role"""
+    async def get_steps_by_role(self, role: str) -> List[Dict[str, Any]]:
+        """Get onboarding steps for a specific role (cached per config version)"""
+        config = await self.get_config_by_role(role)
+        cache_key = ("steps", role, config["version"] if config else None)
+        found, steps = onboarding_cache.get(cache_key)
+        if found:
+            return steps
+        
+        steps = await self._fetch_steps_by_role(role)
+        onboarding_cache.set(cache_key, steps, tag=role)
+        return steps
+    
+    async def _fetch_steps_by_role(self, role: str) -> List[Dict[str, Any]]:
+        """Load onboarding steps for a role from the database"""
         try:
             query = text("""
                 SELECT os.*, oc.name as config_name 
@@ -210,22 +320,9 @@ class OnboardingService:
                 ORDER BY os.step_number
             """)
             
-            result = self.db.execute(query, {"role": role}).fetchall()
-            
-            steps = []
-            for row in result:
-                steps.append({
-                    "id": str(row.id),
-                    "config_id": str(row.config_id),
-                    "config_name": row.config_name,
-                    "step_key": row.step_key,
-                    "title": row.title,
-                    "description": row.description,
-                    "step_number": row.step_number,
-                    "is_required": row.is_required,
-                    "is_active": row.is_active,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
+            result = (await self.db.execute(query, {"role": role})).fetchall()
+            
+            steps = serialize_rows(STEP_BY_ROLE_COLUMNS, result)
             
             return steps
             
@@ -233,8 +330,183 @@ class OnboardingService:
             logger.error(f"❌ Error fetching onboarding steps by role: {str(e)}")
             raise
     
-    def save_user_data(self, user_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Save onboarding data for a user"""
+    async def get_onboarding_tree(self, role: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the default config for a role with its steps and fields nested,
+        built by a single JSON-aggregating query. When `user_id` is given every
+        field also carries the user's saved answer under `user_data`.
+        """
+        if user_id is None:
+            config = await self.get_config_by_role(role)
+            cache_key = ("tree", role, config["version"] if config else None)
+            found, tree = onboarding_cache.get(cache_key)
+            if found:
+                return tree
+        
+        try:
+            user_data_join = ""
+            user_data_column = ""
+            params = {"role": role}
+            
+            if user_id is not None:
+                user_data_join = """
+                            LEFT JOIN user_onboarding_data ud
+                                ON ud.user_id = :user_id
+                                AND ud.config_id = oc.id
+                                AND ud.step_key = s.step_key
+                                AND ud.field_key = f.field_key"""
+                user_data_column = """,
+                                'user_data', CASE WHEN ud.id IS NULL THEN NULL ELSE json_build_object(
+                                    'id', ud.id,
+                                    'text_value', ud.text_value,
+                                    'number_value', ud.number_value,
+                                    'boolean_value', ud.boolean_value,
+                                    'date_value', ud.date_value,
+                                    'time_value', ud.time_value,
+                                    'json_value', ud.json_value,
+                                    'custom_values', ud.custom_values,
+                                    'is_completed', ud.is_completed,
+                                    'updated_at', ud.updated_at
+                                ) END"""
+                params["user_id"] = user_id
+            
+            query = text(f"""
+                SELECT json_build_object(
+                    'id', oc.id,
+                    'target_role', oc.target_role,
+                    'name', oc.name,
+                    'is_default', oc.is_default,
+                    'is_active', oc.is_active,
+                    'version', oc.version,
+                    'created_at', oc.created_at,
+                    'updated_at', oc.updated_at,
+                    'steps', COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'id', s.id,
+                            'config_id', s.config_id,
+                            'step_number', s.step_number,
+                            'step_key', s.step_key,
+                            'title', s.title,
+                            'description', s.description,
+                            'is_required', s.is_required,
+                            'is_active', s.is_active,
+                            'created_at', s.created_at,
+                            'fields', COALESCE((
+                                SELECT json_agg(json_build_object(
+                                    'id', f.id,
+                                    'step_id', f.step_id,
+                                    'field_key', f.field_key,
+                                    'field_type', f.field_type,
+                                    'label', f.label,
+                                    'description', f.description,
+                                    'placeholder', f.placeholder,
+                                    'help_text', f.help_text,
+                                    'reference_category_code', f.reference_category_code,
+                                    'is_required', f.is_required,
+                                    'is_active', f.is_active,
+                                    'field_order', f.field_order,
+                                    'allow_custom_values', f.allow_custom_values,
+                                    'validation_rules', f.validation_rules,
+                                    'field_config', f.field_config,
+                                    'group_id', f.group_id,
+                                    'created_at', f.created_at,
+                                    'updated_at', f.updated_at{user_data_column}
+                                ) ORDER BY f.field_order)
+                                FROM onboarding_fields f{user_data_join}
+                                WHERE f.step_id = s.id AND f.is_active = true
+                            ), '[]'::json)
+                        ) ORDER BY s.step_number)
+                        FROM onboarding_steps s
+                        WHERE s.config_id = oc.id AND s.is_active = true
+                    ), '[]'::json)
+                ) AS tree
+                FROM onboarding_configs oc
+                WHERE oc.target_role = :role AND oc.is_default = true AND oc.is_active = true
+                ORDER BY oc.created_at DESC
+                LIMIT 1
+            """)
+            
+            row = (await self.db.execute(query, params)).fetchone()
+            tree = row.tree if row else None
+            
+            if tree is None:
+                logger.warning(f"No onboarding configuration found for role: {role}")
+            
+        except Exception as e:
+            logger.error(f"❌ Error fetching onboarding tree: {str(e)}")
+            raise
+        
+        if user_id is None:
+            onboarding_cache.set(cache_key, tree, tag=role)
+        
+        return tree
+    
+    async def get_config_validator(self, config_id: str) -> ConfigValidator:
+        """Get compiled validators for a config (built once per config version and reference data version)"""
+        references = ReferenceService(self.db)
+        try:
+            config_version = (await self.db.execute(
+                text("SELECT version FROM onboarding_configs WHERE id = :config_id"),
+                {"config_id": config_id}
+            )).scalar()
+        except Exception as e:
+            logger.error(f"❌ Error loading onboarding config version: {str(e)}")
+            raise
+        
+        cache_key = ("validators", config_id, config_version, await references.get_version())
+        found, validator = onboarding_cache.get(cache_key)
+        if found:
+            return validator
+        
+        try:
+            fields = (await self.db.execute(text("""
+                SELECT s.step_key, f.field_key, f.field_type, f.is_required,
+                       f.validation_rules, f.field_config, f.reference_category_code,
+                       f.allow_custom_values
+                FROM onboarding_configs oc
+                JOIN onboarding_steps s ON s.config_id = oc.id AND s.is_active = true
+                JOIN onboarding_fields f ON f.step_id = s.id AND f.is_active = true
+                WHERE oc.id = :config_id
+            """), {"config_id": config_id})).fetchall()
+            
+            options_by_code = await references.resolve_categories(row.reference_category_code for row in fields)
+            
+            # Answers may store either the option id or its code
+            reference_values = {
+                code: {
+                    str(value)
+                    for option in options
+                    for value in (option.get("id"), option.get("code"))
+                    if value is not None
+                }
+                for code, options in options_by_code.items()
+            }
+        except Exception as e:
+            logger.error(f"❌ Error loading onboarding validation rules: {str(e)}")
+            raise
+        
+        validator = ConfigValidator(
+            config_id,
+            config_version,
+            {
+                (row.step_key, row.field_key): compile_field_validator(row._mapping, reference_values)
+                for row in fields
+            }
+        )
+        onboarding_cache.set(cache_key, validator, tag=ANY_ROLE_TAG)
+        return validator
+    
+    async def save_user_data(self, user_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Save onboarding data for a user (raises OnboardingValidationError on rule violations)"""
+        data = dict(data)
+        error = coerce_answer(data)
+        if not error and data.get("config_id"):
+            error = (await self.get_config_validator(data["config_id"])).validate(data)
+        if error:
+            raise OnboardingValidationError([{"field_key": data.get("field_key"), "error": error}])
+        
+        values = _answer_bind_values(data)
+        
         try:
             # Insert or update onboarding data
             query = text("""
@@ -265,27 +537,142 @@ class OnboardingService:
                 "config_id": data.get("config_id"),
                 "step_key": data.get("step_key"),
                 "field_key": data.get("field_key"),
-                "text_value": data.get("text_value"),
-                "number_value": data.get("number_value"),
-                "boolean_value": data.get("boolean_value"),
-                "date_value": data.get("date_value"),
-                "time_value": data.get("time_value"),
-                "json_value": data.get("json_value"),
-                "custom_values": data.get("custom_values"),
+                **values,
                 "is_completed": data.get("is_completed", False)
             }
             
-            self.db.execute(query, params)
-            self.db.commit()
+            await self.db.execute(query, params)
+            if params["config_id"]:
+                await self.refresh_progress(user_id, params["config_id"])
+            await self.db.commit()
             
             return {"success": True, "message": "Onboarding data saved successfully"}
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"❌ Error saving onboarding data: {str(e)}")
             raise
     
-    def get_user_data(self, user_id: str, config_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def save_user_data_batch(
+        self,
+        user_id: str,
+        items: List[Dict[str, Any]],
+        config_id: Optional[str] = None,
+        step_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Save many onboarding answers for a user in one transaction.
+        
+        `config_id` / `step_key` are defaults for items that do not set them.
+        Valid items are written with a single multi-row upsert; invalid ones are
+        skipped and reported in `errors` with their index and field_key.
+        """
+        errors = []
+        candidates = []
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "field_key": None, "error": "Item must be an object"})
+                continue
+            
+            row = {column: item.get(column) for column in USER_DATA_VALUE_COLUMNS}
+            row["config_id"] = item.get("config_id") or config_id
+            row["step_key"] = item.get("step_key") or step_key
+            row["field_key"] = item.get("field_key")
+            row["is_completed"] = item.get("is_completed", False)
+            
+            missing = [key for key in ("config_id", "step_key", "field_key") if not row[key]]
+            if missing:
+                errors.append({
+                    "index": index,
+                    "field_key": row["field_key"],
+                    "error": f"Missing required: {', '.join(missing)}"
+                })
+                continue
+            
+            if not _is_uuid(row["config_id"]):
+                errors.append({"index": index, "field_key": row["field_key"], "error": "Invalid config_id"})
+                continue
+            row["config_id"] = str(row["config_id"])
+            candidates.append((index, row))
+        
+        # One validator lookup per distinct config, not per item
+        validators = {}
+        for batch_config_id in {row["config_id"] for _, row in candidates}:
+            validators[batch_config_id] = await self.get_config_validator(batch_config_id)
+        
+        rows_by_key = {}
+        for index, row in candidates:
+            error = coerce_answer(row) or validators[row["config_id"]].validate(row)
+            if error:
+                errors.append({"index": index, "field_key": row["field_key"], "error": error})
+                continue
+            
+            row.update(_answer_bind_values(row))
+            
+            # The same conflict key twice in one upsert is rejected by Postgres; last value wins
+            conflict_key = (row["config_id"], row["step_key"], row["field_key"])
+            if conflict_key in rows_by_key:
+                previous_index, _ = rows_by_key[conflict_key]
+                errors.append({
+                    "index": previous_index,
+                    "field_key": row["field_key"],
+                    "error": "Overridden by a later item with the same field"
+                })
+            rows_by_key[conflict_key] = (index, row)
+        
+        if not rows_by_key:
+            return {"success": False, "saved": 0, "errors": errors}
+        
+        values_sql = []
+        params = {"user_id": user_id}
+        for i, (_, row) in enumerate(rows_by_key.values()):
+            values_sql.append(
+                f"(:id_{i}, :user_id, :config_id_{i}, :step_key_{i}, :field_key_{i}, "
+                f":text_value_{i}, :number_value_{i}, :boolean_value_{i}, :date_value_{i}, "
+                f":time_value_{i}, :json_value_{i}, :custom_values_{i}, :is_completed_{i}, NOW(), NOW())"
+            )
+            params[f"id_{i}"] = str(uuid.uuid4())
+            for column, value in row.items():
+                params[f"{column}_{i}"] = value
+        
+        query = text(f"""
+            INSERT INTO user_onboarding_data 
+            (id, user_id, config_id, step_key, field_key, text_value, number_value, 
+             boolean_value, date_value, time_value, json_value, custom_values, 
+             is_completed, created_at, updated_at)
+            VALUES {", ".join(values_sql)}
+            ON CONFLICT (user_id, config_id, step_key, field_key)
+            DO UPDATE SET
+                text_value = EXCLUDED.text_value,
+                number_value = EXCLUDED.number_value,
+                boolean_value = EXCLUDED.boolean_value,
+                date_value = EXCLUDED.date_value,
+                time_value = EXCLUDED.time_value,
+                json_value = EXCLUDED.json_value,
+                custom_values = EXCLUDED.custom_values,
+                is_completed = EXCLUDED.is_completed,
+                updated_at = NOW()
+        """)
+        
+        try:
+            await self.db.execute(query, params)
+            for batch_config_id in {row["config_id"] for _, row in rows_by_key.values()}:
+                await self.refresh_progress(user_id, batch_config_id)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Error saving onboarding data batch: {str(e)}")
+            raise
+        
+        logger.info(f"✅ Saved {len(rows_by_key)} onboarding answers for user {user_id}")
+        return {
+            "success": not errors,
+            "saved": len(rows_by_key),
+            "errors": sorted(errors, key=lambda error: error["index"])
+        }
+    
+    async def get_user_data(self, user_id: str, config_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get onboarding data for a user"""
         try:
             query = "SELECT * FROM user_onboarding_data WHERE user_id = :user_id"
@@ -297,30 +684,222 @@ class OnboardingService:
             
             query += " ORDER BY created_at"
             
-            result = self.db.execute(text(query), params).fetchall()
-            
-            data = []
-            for row in result:
-                data.append({
-                    "id": str(row.id),
-                    "user_id": str(row.user_id),
-                    "config_id": str(row.config_id),
-                    "step_key": row.step_key,
-                    "field_key": row.field_key,
-                    "text_value": row.text_value,
-                    "number_value": row.number_value,
-                    "boolean_value": row.boolean_value,
-                    "date_value": row.date_value.isoformat() if row.date_value else None,
-                    "time_value": row.time_value.isoformat() if row.time_value else None,
-                    "json_value": row.json_value,
-                    "custom_values": row.custom_values,
-                    "is_completed": row.is_completed,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "updated_at": row.updated_at.isoformat() if row.updated_at else None
-                })
+            result = (await self.db.execute(text(query), params)).fetchall()
+            
+            data = serialize_rows(USER_DATA_COLUMNS, result)
             
             return data
             
         except Exception as e:
             logger.error(f"❌ Error fetching user onboarding data: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def get_user_data_page(
+        self,
+        user_id: str,
+        config_id: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Get a page of a user's onboarding answers ordered by (updated_at, id).
+        
+        `updated_since` returns only answers changed after that moment;
+        `cursor` continues after the last row of a previous page. The returned
+        `next_cursor` is also a valid sync position for later calls.
+        Served by idx_user_onboarding_data_user_updated (user_id, updated_at, id).
+        """
+        where, params = self._user_data_filter(user_id, config_id, updated_since)
+        query = f"SELECT * FROM user_onboarding_data WHERE {where}"
+        params["limit"] = limit + 1
+        
+        if cursor:
+            cursor_updated_at, cursor_id = decode_cursor(cursor, 2)
+            try:
+                params["cursor_updated_at"] = datetime.fromisoformat(cursor_updated_at)
+                params["cursor_id"] = uuid.UUID(cursor_id)
+            except (TypeError, ValueError):
+                raise InvalidCursorError("Invalid cursor: bad key values")
+            query += " AND (updated_at, id) > (:cursor_updated_at, :cursor_id)"
+        
+        query += " ORDER BY updated_at, id LIMIT :limit"
+        
+        try:
+            result = (await self.db.execute(text(query), params)).fetchall()
+        except Exception as e:
+            logger.error(f"❌ Error fetching user onboarding data page: {str(e)}")
+            raise
+        
+        has_more = len(result) > limit
+        rows = result[:limit]
+        last = rows[-1] if rows else None
+        
+        return {
+            "data": serialize_rows(USER_DATA_COLUMNS, rows),
+            "has_more": has_more,
+            "next_cursor": encode_cursor(last.updated_at.isoformat(), last.id) if last else cursor
+        }
+    
+    @staticmethod
+    def _user_data_filter(
+        user_id: str,
+        config_id: Optional[str],
+        updated_since: Optional[datetime]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """WHERE clause (and params) shared by the user data page and its count"""
+        where = "user_id = :user_id"
+        params: Dict[str, Any] = {"user_id": user_id}
+        
+        if config_id:
+            where += " AND config_id = :config_id"
+            params["config_id"] = config_id
+        
+        if updated_since is not None:
+            where += " AND updated_at > :updated_since"
+            params["updated_since"] = updated_since
+        
+        return where, params
+    
+    async def count_user_data(
+        self,
+        user_id: str,
+        config_id: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+        mode: str = "exact"
+    ) -> Optional[int]:
+        """
+        Total answers matching the user data page filters (ignoring the cursor).
+        
+        `estimated` takes the planner's row estimate and only counts exactly
+        when that is below EXACT_COUNT_BELOW; `none` returns None.
+        """
+        if mode == "none":
+            return None
+        
+        where, params = self._user_data_filter(user_id, config_id, updated_since)
+        
+        try:
+            if mode == "estimated":
+                result = await self.db.execute(
+                    text(f"EXPLAIN (FORMAT JSON) SELECT id FROM user_onboarding_data WHERE {where}"),
+                    params
+                )
+                estimate = plan_rows(result.scalar())
+                if estimate is not None and estimate >= EXACT_COUNT_BELOW:
+                    return estimate
+            
+            result = await self.db.execute(
+                text(f"SELECT COUNT(*) FROM user_onboarding_data WHERE {where}"),
+                params
+            )
+            return result.scalar()
+        except Exception as e:
+            logger.error(f"❌ Error counting user onboarding data: {str(e)}")
+            raise
+    
+    # ===== Onboarding progress =====
+    
+    async def refresh_progress(self, user_id: str, config_id: str) -> None:
+        """
+        Recompute the progress row of one user/config. Runs inside the caller's
+        transaction (no commit) so it stays consistent with the saved answers.
+        """
+        await self.db.execute(text("""
+            WITH step_stats AS (
+                SELECT
+                    s.id,
+                    COUNT(f.id) FILTER (WHERE f.is_required) AS required_total,
+                    COUNT(f.id) FILTER (WHERE f.is_required AND ud.id IS NOT NULL) AS required_answered,
+                    COUNT(ud.id) AS answered
+                FROM onboarding_steps s
+                LEFT JOIN onboarding_fields f
+                    ON f.step_id = s.id AND f.is_active = true
+                LEFT JOIN user_onboarding_data ud
+                    ON ud.user_id = :user_id
+                    AND ud.config_id = s.config_id
+                    AND ud.step_key = s.step_key
+                    AND ud.field_key = f.field_key
+                    AND (ud.text_value IS NOT NULL OR ud.number_value IS NOT NULL
+                         OR ud.boolean_value IS NOT NULL OR ud.date_value IS NOT NULL
+                         OR ud.time_value IS NOT NULL OR ud.json_value IS NOT NULL
+                         OR ud.custom_values IS NOT NULL)
+                WHERE s.config_id = :config_id AND s.is_active = true
+                GROUP BY s.id
+            )
+            INSERT INTO user_onboarding_progress
+            (user_id, config_id, steps_total, steps_completed, required_fields_total,
+             required_fields_remaining, percent, updated_at)
+            SELECT
+                CAST(:user_id AS uuid),
+                CAST(:config_id AS uuid),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE required_answered = required_total AND answered > 0),
+                COALESCE(SUM(required_total), 0),
+                COALESCE(SUM(required_total - required_answered), 0),
+                CASE WHEN COALESCE(SUM(required_total), 0) = 0 THEN 100
+                     ELSE ROUND(100.0 * SUM(required_answered) / SUM(required_total))
+                END,
+                NOW()
+            FROM step_stats
+            ON CONFLICT (user_id, config_id)
+            DO UPDATE SET
+                steps_total = EXCLUDED.steps_total,
+                steps_completed = EXCLUDED.steps_completed,
+                required_fields_total = EXCLUDED.required_fields_total,
+                required_fields_remaining = EXCLUDED.required_fields_remaining,
+                percent = EXCLUDED.percent,
+                updated_at = NOW()
+        """), {"user_id": user_id, "config_id": config_id})
+    
+    async def get_progress(self, user_id: str, config_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's progress for a config (primary-key lookup, computed on
+        first access). Returns None when the config does not exist.
+        """
+        query = text("""
+            SELECT * FROM user_onboarding_progress
+            WHERE user_id = :user_id AND config_id = :config_id
+        """)
+        params = {"user_id": user_id, "config_id": config_id}
+        
+        try:
+            row = (await self.db.execute(query, params)).fetchone()
+            
+            if not row:
+                config_exists = (await self.db.execute(
+                    text("SELECT 1 FROM onboarding_configs WHERE id = :config_id"),
+                    {"config_id": config_id}
+                )).first()
+                if not config_exists:
+                    return None
+                
+                # Users who answered before progress tracking existed
+                await self.refresh_progress(user_id, config_id)
+                await self.db.commit()
+                row = (await self.db.execute(query, params)).fetchone()
+            
+            return get_serializer(PROGRESS_COLUMNS)(row) if row else None
+            
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Error fetching onboarding progress: {str(e)}")
+            raise
+    
+    async def get_progress_bulk(self, user_ids: List[str], config_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get stored progress rows for many users in one query (admin dashboards)"""
+        query = "SELECT * FROM user_onboarding_progress WHERE user_id = ANY(:user_ids)"
+        params = {"user_ids": user_ids}
+        
+        if config_id:
+            query += " AND config_id = :config_id"
+            params["config_id"] = config_id
+        
+        query += " ORDER BY user_id, config_id"
+        
+        try:
+            result = (await self.db.execute(text(query), params)).fetchall()
+            return serialize_rows(PROGRESS_COLUMNS, result)
+        except Exception as e:
+            logger.error(f"❌ Error fetching onboarding progress in bulk: {str(e)}")
+            raise
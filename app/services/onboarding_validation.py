@@ -0,0 +1,290 @@
+"""
+Onboarding answer validation
+Compiles onboarding_fields.validation_rules / field_config into reusable validators
+"""
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import re
+
+# Value columns of user_onboarding_data, in the order they are inspected
+VALUE_COLUMNS = (
+    "text_value", "number_value", "boolean_value", "date_value",
+    "time_value", "json_value", "custom_values"
+)
+
+BOOLEAN_STRINGS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+PHONE_PATTERN = r"^\+?[0-9\s\-()]{7,20}$"
+
+Check = Callable[[Any], Optional[str]]
+
+
+class OnboardingValidationError(ValueError):
+    """Answers violate the onboarding field rules"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{error['field_key']}: {error['error']}" for error in errors))
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    """JSONB columns normally arrive parsed; tolerate text columns once, at compile time"""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _as_number(value: Any) -> Optional[Decimal]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _coerce_number(value: Any) -> Any:
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        number = _as_number(value.strip())
+        if number is not None and number.is_finite():
+            return number
+    raise ValueError("Очікується число")
+
+
+def _coerce_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in BOOLEAN_STRINGS:
+        return BOOLEAN_STRINGS[value.strip().lower()]
+    raise ValueError("Очікується логічне значення")
+
+
+def _coerce_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        raise ValueError("Невірна дата, очікується РРРР-ММ-ДД")
+
+
+def _coerce_time(value: Any) -> time:
+    if isinstance(value, time):
+        return value
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("Невірний час, очікується ГГ:ХХ")
+
+
+# Typed answer columns and the conversion to the Python type the driver expects
+_COERCIONS = (
+    ("number_value", _coerce_number),
+    ("boolean_value", _coerce_boolean),
+    ("date_value", _coerce_date),
+    ("time_value", _coerce_time),
+)
+
+
+def coerce_answer(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Convert the typed value columns of an answer in place ("5" -> Decimal,
+    "true" -> True, ISO strings -> date/time).
+
+    Returns an error message when a value cannot be converted, so it is
+    reported per field instead of failing in the database driver.
+    """
+    for column, coerce in _COERCIONS:
+        if data.get(column) is not None:
+            try:
+                data[column] = coerce(data[column])
+            except ValueError as e:
+                return str(e)
+    return None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _first_value(data: Dict[str, Any]) -> Any:
+    for column in VALUE_COLUMNS:
+        value = data.get(column)
+        if value is not None:
+            return value
+    return None
+
+
+def _length_check(min_length: Optional[int], max_length: Optional[int]) -> Check:
+    def check(value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return None
+        if min_length is not None and len(value) < min_length:
+            return f"Мінімальна довжина {min_length}"
+        if max_length is not None and len(value) > max_length:
+            return f"Максимальна довжина {max_length}"
+        return None
+    return check
+
+
+def _pattern_check(pattern: str, message: str) -> Check:
+    compiled = re.compile(pattern)
+
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, str) and not compiled.search(value):
+            return message
+        return None
+    return check
+
+
+def _range_check(minimum: Optional[Decimal], maximum: Optional[Decimal]) -> Check:
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, (list, dict)):
+            return None
+        number = _as_number(value)
+        if number is None:
+            return "Очікується число"
+        if minimum is not None and number < minimum:
+            return f"Значення має бути не менше {minimum}"
+        if maximum is not None and number > maximum:
+            return f"Значення має бути не більше {maximum}"
+        return None
+    return check
+
+
+def _selections_check(min_selections: Optional[int], max_selections: Optional[int]) -> Check:
+    def check(value: Any) -> Optional[str]:
+        if not isinstance(value, list):
+            return None
+        if min_selections is not None and len(value) < min_selections:
+            return f"Оберіть щонайменше {min_selections}"
+        if max_selections is not None and len(value) > max_selections:
+            return f"Оберіть не більше {max_selections}"
+        return None
+    return check
+
+
+def _membership_check(allowed: frozenset) -> Check:
+    def check(value: Any) -> Optional[str]:
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            if str(item) not in allowed:
+                return f"Недопустиме значення: {item}"
+        return None
+    return check
+
+
+class FieldValidator:
+    """Validator of one onboarding field with its checks prebuilt"""
+
+    __slots__ = ("field_key", "is_required", "checks")
+
+    def __init__(self, field_key: str, is_required: bool, checks: Tuple[Check, ...]):
+        self.field_key = field_key
+        self.is_required = is_required
+        self.checks = checks
+
+    def validate(self, data: Dict[str, Any]) -> Optional[str]:
+        """Return an error message, or None when the answer is valid"""
+        value = _first_value(data)
+        if _is_empty(value):
+            # Drafts may be saved empty; required answers are enforced on completion
+            if self.is_required and data.get("is_completed"):
+                return "Обов'язкове поле"
+            return None
+
+        for check in self.checks:
+            error = check(value)
+            if error:
+                return error
+        return None
+
+
+def compile_field_validator(
+    field: Dict[str, Any],
+    reference_values: Optional[Dict[str, Iterable[str]]] = None
+) -> FieldValidator:
+    """
+    Build a validator from an onboarding field definition.
+
+    Args:
+        field: Row with field_key, field_type, is_required, validation_rules,
+            field_config, reference_category_code and allow_custom_values
+        reference_values: Allowed values per reference category code
+    """
+    rules = _as_dict(field.get("validation_rules"))
+    config = _as_dict(field.get("field_config"))
+    field_type = field.get("field_type")
+    checks: List[Check] = []
+
+    min_length = rules.get("min_length", rules.get("minLength"))
+    max_length = rules.get("max_length", rules.get("maxLength"))
+    if min_length is not None or max_length is not None:
+        checks.append(_length_check(
+            int(min_length) if min_length is not None else None,
+            int(max_length) if max_length is not None else None
+        ))
+
+    pattern = rules.get("pattern") or rules.get("regex")
+    if pattern:
+        checks.append(_pattern_check(pattern, rules.get("pattern_message") or "Невірний формат"))
+    elif field_type == "email":
+        checks.append(_pattern_check(EMAIL_PATTERN, "Невірний email"))
+    elif field_type == "phone":
+        checks.append(_pattern_check(PHONE_PATTERN, "Невірний номер телефону"))
+
+    minimum = rules.get("min", rules.get("min_value", config.get("min")))
+    maximum = rules.get("max", rules.get("max_value", config.get("max")))
+    if minimum is not None or maximum is not None:
+        checks.append(_range_check(_as_number(minimum), _as_number(maximum)))
+
+    min_selections = rules.get("min_selections")
+    max_selections = rules.get("max_selections")
+    if min_selections is not None or max_selections is not None:
+        checks.append(_selections_check(
+            int(min_selections) if min_selections is not None else None,
+            int(max_selections) if max_selections is not None else None
+        ))
+
+    if not field.get("allow_custom_values"):
+        allowed = None
+        options = rules.get("options") or rules.get("enum") or config.get("options")
+        if isinstance(options, list):
+            allowed = {str(option.get("value") if isinstance(option, dict) else option) for option in options}
+        category_code = field.get("reference_category_code")
+        if category_code and reference_values is not None and category_code in reference_values:
+            allowed = (allowed or set()) | {str(value) for value in reference_values[category_code]}
+        if allowed:
+            checks.append(_membership_check(frozenset(allowed)))
+
+    return FieldValidator(field["field_key"], bool(field.get("is_required")), tuple(checks))
+
+
+class ConfigValidator:
+    """All field validators of one config version, keyed by (step_key, field_key)"""
+
+    def __init__(self, config_id: str, version: Any, validators: Dict[Tuple[str, str], FieldValidator]):
+        self.config_id = config_id
+        self.version = version
+        self.validators = validators
+
+    def validate(self, data: Dict[str, Any]) -> Optional[str]:
+        """Validate one answer; fields without a definition are accepted as-is"""
+        validator = self.validators.get((data.get("step_key"), data.get("field_key")))
+        if validator is None:
+            return None
+        return validator.validate(data)
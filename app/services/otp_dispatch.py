@@ -0,0 +1,374 @@
+"""
+OTP dispatch service
+In-process queue that delivers OTP SMS in the background with retries and
+per-provider concurrency limits
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OtpQueueFull(Exception):
+    """The dispatch queue is full; the caller should retry later"""
+    pass
+
+
+class SmsDeliveryError(Exception):
+    """The provider did not accept the message"""
+    pass
+
+
+class OtpMessage:
+    """One OTP to deliver"""
+
+    def __init__(self, phone: str, purpose: str, code: Optional[str] = None):
+        self.phone = phone
+        self.purpose = purpose
+        self.code = code
+        self.attempts = 0
+        self.enqueued_at = time.perf_counter()
+
+
+class SmsProvider(ABC):
+    """
+    Delivery backend for OTP codes.
+
+    `send` raises on failure (the dispatcher retries it); at most
+    `max_concurrency` sends run against one provider at a time. Providers
+    with `issues_codes` generate the code themselves and check it in
+    `verify`; the others deliver the code they are given.
+    """
+
+    name = "base"
+    issues_codes = False
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+
+    @abstractmethod
+    async def send(self, phone: str, purpose: str, code: Optional[str]) -> None:
+        """Deliver one OTP; raise to have the dispatcher retry it"""
+
+    async def verify(self, phone: str, code: str, purpose: str) -> bool:
+        return False
+
+
+class TurboSmsProvider(SmsProvider):
+    """
+    Production provider: the blocking helpers of `app.sms`, run on a thread
+    pool sized to the provider's concurrency limit.
+    """
+
+    name = "turbosms"
+    issues_codes = True
+
+    def __init__(self, max_concurrency: int = 4):
+        super().__init__(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="sms")
+
+    async def _run(self, func, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def send(self, phone: str, purpose: str, code: Optional[str]) -> None:
+        from ..sms import send_otp_sms
+
+        if not await self._run(send_otp_sms, phone, purpose):
+            raise SmsDeliveryError(f"provider rejected OTP for {phone}")
+
+    async def verify(self, phone: str, code: str, purpose: str) -> bool:
+        from ..sms import verify_otp
+
+        return await self._run(verify_otp, phone, code, purpose)
+
+
+class LocalSmsProvider(SmsProvider):
+    """
+    Offline provider for development and load tests.
+
+    Every "SMS" is appended as a line to `output` ("-" for stdout).
+    `latency_ms` and `failure_rate` simulate a slow or flaky provider.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        output: str = "-",
+        max_concurrency: int = 4,
+        latency_ms: float = 0.0,
+        failure_rate: float = 0.0
+    ):
+        super().__init__(max_concurrency)
+        self.output = output
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self._lock = threading.Lock()
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            if self.output == "-":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                with open(self.output, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+    async def send(self, phone: str, purpose: str, code: Optional[str]) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise SmsDeliveryError("simulated provider failure")
+
+        self._write(f"{datetime.now(timezone.utc).isoformat()}\t{phone}\t{purpose}\t{code}\n")
+
+
+class OtpSlot:
+    """
+    A claimed place in the dispatch queue.
+
+    `enqueue` fills it; leaving the `with` block without enqueueing gives
+    the place back.
+    """
+
+    def __init__(self, dispatcher: "OtpDispatcher"):
+        self._dispatcher = dispatcher
+        self._held = True
+
+    def enqueue(self, phone: str, purpose: str, code: Optional[str] = None) -> None:
+        if not self._held:
+            raise RuntimeError("OTP queue slot already used")
+        self._dispatcher._put(OtpMessage(phone, purpose, code))
+        self.release()
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self._dispatcher._reserved -= 1
+
+    def __enter__(self) -> "OtpSlot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class OtpDispatcher:
+    """
+    Background delivery of OTP messages.
+
+    `enqueue` only puts the message on an asyncio queue bounded by
+    `max_queue`, so the API answers without waiting for the provider.
+    Callers that change OTP state before queueing first `reserve` a slot,
+    which fails with OtpQueueFull before any side effect. `workers` tasks
+    take messages off the queue; a failed send is put back after an
+    exponential backoff with jitter until `max_attempts` is reached. Retries
+    wait on timers, not on a worker, so a stalled provider only holds its own
+    concurrency slots.
+    """
+
+    def __init__(
+        self,
+        provider: SmsProvider,
+        workers: int = 8,
+        max_queue: int = 1000,
+        max_attempts: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        send_timeout: float = 15.0
+    ):
+        self.provider = provider
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.send_timeout = send_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._reserved = 0
+        self._tasks: List[asyncio.Task] = []
+        self._retry_handles: Dict[OtpMessage, asyncio.TimerHandle] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight = 0
+        self.enqueued = 0
+        self.rejected = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_delivery_seconds = 0.0
+        self.total_send_seconds = 0.0
+        self.sends = 0
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self.running:
+            return
+        # Capacity is enforced by reserve(); retries always fit back in
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"✅ OTP dispatcher started ({self.provider.name}, {self.workers} workers)")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Give queued messages `drain_timeout` seconds to go out, then stop the workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        for handle in self._retry_handles.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        undelivered = self._queue.qsize() + len(self._retry_handles)
+        if undelivered:
+            logger.warning(f"⚠️ OTP dispatcher stopped with {undelivered} undelivered messages")
+        self._retry_handles.clear()
+        self._tasks = []
+        self._queue = None
+
+    def has_capacity(self) -> bool:
+        """True when a message can be queued right now"""
+        queued = self._queue.qsize() if self._queue else 0
+        return queued + self._reserved < self.max_queue
+
+    def reserve(self) -> OtpSlot:
+        """Claim a queue place up front; raises OtpQueueFull when the queue is at capacity"""
+        self.start()
+        if not self.has_capacity():
+            self.rejected += 1
+            raise OtpQueueFull()
+        self._reserved += 1
+        return OtpSlot(self)
+
+    def enqueue(self, phone: str, purpose: str, code: Optional[str] = None) -> None:
+        """Queue an OTP for delivery; raises OtpQueueFull when the queue is at capacity"""
+        with self.reserve() as slot:
+            slot.enqueue(phone, purpose, code)
+
+    def _put(self, message: OtpMessage) -> None:
+        self._queue.put_nowait(message)
+        self.enqueued += 1
+
+    async def verify(self, phone: str, code: str, purpose: str) -> bool:
+        return await self.provider.verify(phone, code, purpose)
+
+    def _semaphore(self, provider: SmsProvider) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(provider.name)
+        if semaphore is None:
+            semaphore = self._semaphores[provider.name] = asyncio.Semaphore(provider.max_concurrency)
+        return semaphore
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _requeue(self, message: OtpMessage) -> None:
+        self._retry_handles.pop(message, None)
+        self._queue.put_nowait(message)
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                logger.error(f"❌ OTP worker error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message: OtpMessage) -> None:
+        provider = self.provider
+        message.attempts += 1
+
+        async with self._semaphore(provider):
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(provider.send(message.phone, message.purpose, message.code), self.send_timeout)
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                self.in_flight -= 1
+                self.sends += 1
+                self.total_send_seconds += time.perf_counter() - started
+
+        if error is None:
+            self.sent += 1
+            self.total_delivery_seconds += time.perf_counter() - message.enqueued_at
+            logger.info(f"✅ OTP sent to {message.phone} via {provider.name} (attempt {message.attempts})")
+            return
+
+        if message.attempts >= self.max_attempts:
+            self.failed += 1
+            logger.error(f"❌ Failed to send OTP to {message.phone} after {message.attempts} attempts: {error!r}")
+            return
+
+        delay = self._backoff(message.attempts)
+        self.retried += 1
+        logger.warning(f"⚠️ OTP to {message.phone} failed ({error!r}), retry in {delay:.1f}s")
+        self._retry_handles[message] = asyncio.get_running_loop().call_later(delay, self._requeue, message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and delivery counters for monitoring endpoints"""
+        return {
+            "provider": self.provider.name,
+            "provider_concurrency": self.provider.max_concurrency,
+            "running": self.running,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "reserved": self._reserved,
+            "waiting_retry": len(self._retry_handles),
+            "in_flight": self.in_flight,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_send_ms": round(self.total_send_seconds / self.sends * 1000, 2) if self.sends else 0.0,
+            "avg_delivery_ms": round(self.total_delivery_seconds / self.sent * 1000, 2) if self.sent else 0.0
+        }
+
+
+def _build_provider() -> SmsProvider:
+    """SMS_PROVIDER=turbosms (default) or local"""
+    name = os.getenv("SMS_PROVIDER", "turbosms").lower()
+    concurrency = int(os.getenv("SMS_PROVIDER_CONCURRENCY", "4"))
+    if name == "local":
+        return LocalSmsProvider(
+            output=os.getenv("SMS_LOCAL_OUTPUT", "-"),
+            max_concurrency=concurrency,
+            latency_ms=float(os.getenv("SMS_LOCAL_LATENCY_MS", "0")),
+            failure_rate=float(os.getenv("SMS_LOCAL_FAILURE_RATE", "0"))
+        )
+    if name != "turbosms":
+        logger.warning(f"⚠️ Unknown SMS_PROVIDER={name}, using turbosms")
+    return TurboSmsProvider(max_concurrency=concurrency)
+
+
+otp_dispatcher = OtpDispatcher(
+    _build_provider(),
+    workers=int(os.getenv("OTP_DISPATCH_WORKERS", "8")),
+    max_queue=int(os.getenv("OTP_QUEUE_MAX", "1000")),
+    max_attempts=int(os.getenv("OTP_SEND_MAX_ATTEMPTS", "4")),
+    backoff_base=float(os.getenv("OTP_RETRY_BACKOFF_SECONDS", "0.5")),
+    send_timeout=float(os.getenv("SMS_SEND_TIMEOUT_SECONDS", "15"))
+)
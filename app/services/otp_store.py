@@ -0,0 +1,377 @@
+"""
+OTP store
+Hashed one-time codes with TTL expiry, verify attempt counters and per-phone
+sliding-window send limits, kept in memory or in Postgres
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+import hashlib
+import hmac
+import logging
+import math
+import os
+import secrets
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Fallback verification for codes generated by the SMS provider itself
+CodeCheck = Callable[[str, str, str], Awaitable[bool]]
+
+
+class OtpRateLimited(Exception):
+    """Too many OTP sends for a phone within the limit window"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def generate_code(digits: int = 6) -> str:
+    return f"{secrets.randbelow(10 ** digits):0{digits}d}"
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel for expiry.
+
+    Keys are bucketed by the tick their deadline falls in; advancing the
+    wheel returns the keys of every tick that has passed, so expiry costs
+    O(expired keys) rather than a scan of everything stored. Deadlines past
+    one revolution land in the farthest slot; callers re-check the real
+    deadline and reschedule keys that are still alive.
+    """
+
+    def __init__(self, tick_seconds: float, slots: int, now: float):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self._current = int(now / tick_seconds)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        tick = max(math.ceil(deadline / self.tick_seconds), self._current + 1)
+        tick = min(tick, self._current + len(self._slots))
+        self._slots[tick % len(self._slots)].add(key)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Pop the keys of all ticks up to `now`"""
+        target = int(now / self.tick_seconds)
+        expired: List[Hashable] = []
+        for tick in range(self._current + 1, self._current + 1 + min(target - self._current, len(self._slots))):
+            slot = self._slots[tick % len(self._slots)]
+            expired.extend(slot)
+            slot.clear()
+        self._current = max(self._current, target)
+        return expired
+
+
+class OtpStore(ABC):
+    """
+    Issue and verify one-time codes.
+
+    Only an HMAC of (phone, purpose, code) is stored. A phone may be sent at
+    most `send_limit` codes per sliding `send_window_seconds` and one per
+    `send_interval_seconds`; issuing beyond that raises OtpRateLimited. Each
+    code allows `max_attempts` verifications, after which it is discarded.
+
+    `issue(..., generate=False)` records the send and attempt counter without
+    a code, for providers that generate and check codes themselves; `verify`
+    then delegates the comparison to `check`.
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        secret: bytes,
+        ttl_seconds: float = 300.0,
+        max_attempts: int = 5,
+        send_limit: int = 5,
+        send_window_seconds: float = 3600.0,
+        send_interval_seconds: float = 60.0
+    ):
+        self._secret = secret
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self.send_limit = send_limit
+        self.send_window_seconds = send_window_seconds
+        self.send_interval_seconds = send_interval_seconds
+        self.issued = 0
+        self.rate_limited = 0
+        self.verified = 0
+        self.rejected = 0
+        self.locked_out = 0
+
+    def _hash(self, phone: str, purpose: str, code: str) -> bytes:
+        return hmac.new(self._secret, f"{phone}\0{purpose}\0{code}".encode("utf-8"), hashlib.sha256).digest()
+
+    def _retry_after(self, sends: int, oldest_age: Optional[float], newest_age: Optional[float]) -> int:
+        """Seconds until the phone may be sent another code (0 = now)"""
+        wait = 0.0
+        if newest_age is not None:
+            wait = self.send_interval_seconds - newest_age
+        if sends >= self.send_limit and oldest_age is not None:
+            wait = max(wait, self.send_window_seconds - oldest_age)
+        return math.ceil(wait) if wait > 0 else 0
+
+    @abstractmethod
+    async def issue(self, phone: str, purpose: str, generate: bool = True) -> Optional[str]:
+        """Record a send and return a fresh code (None when generate=False)"""
+
+    @abstractmethod
+    async def verify(self, phone: str, purpose: str, code: str, check: Optional[CodeCheck] = None) -> bool:
+        """Check a code in one keyed lookup; a correct code is consumed"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring endpoints"""
+        return {
+            "store": self.name,
+            "ttl_seconds": self.ttl_seconds,
+            "max_attempts": self.max_attempts,
+            "send_limit": self.send_limit,
+            "send_window_seconds": self.send_window_seconds,
+            "send_interval_seconds": self.send_interval_seconds,
+            "issued": self.issued,
+            "rate_limited": self.rate_limited,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "locked_out": self.locked_out
+        }
+
+
+class MemoryOtpStore(OtpStore):
+    """
+    Per-process store: a dict of [code hash, expires, attempts] per
+    (phone, purpose), a deque of send times per phone, and a timing wheel
+    that drops both once they expire. Suitable for a single worker.
+    """
+
+    name = "memory"
+
+    def __init__(self, secret: bytes, tick_seconds: float = 5.0, **limits: Any):
+        super().__init__(secret, **limits)
+        horizon = max(self.ttl_seconds, self.send_window_seconds)
+        self._codes: Dict[Tuple[str, str], List[Any]] = {}
+        self._sends: Dict[str, Deque[float]] = {}
+        self._wheel = TimingWheel(tick_seconds, math.ceil(horizon / tick_seconds) + 1, time.monotonic())
+
+    def _expire(self, now: float) -> None:
+        for key in self._wheel.advance(now):
+            if key[0] == "code":
+                entry = self._codes.get(key[1:])
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._codes[key[1:]]
+                else:
+                    self._wheel.schedule(key, entry[1])
+            else:
+                sends = self._sends.get(key[1])
+                if sends is None:
+                    continue
+                if sends[-1] + self.send_window_seconds <= now:
+                    del self._sends[key[1]]
+                else:
+                    self._wheel.schedule(key, sends[-1] + self.send_window_seconds)
+
+    async def issue(self, phone: str, purpose: str, generate: bool = True) -> Optional[str]:
+        now = time.monotonic()
+        self._expire(now)
+
+        sends = self._sends.get(phone)
+        if sends is None:
+            sends = self._sends[phone] = deque()
+        while sends and sends[0] <= now - self.send_window_seconds:
+            sends.popleft()
+
+        retry_after = self._retry_after(
+            len(sends), now - sends[0] if sends else None, now - sends[-1] if sends else None
+        )
+        if retry_after:
+            self.rate_limited += 1
+            raise OtpRateLimited(retry_after)
+
+        sends.append(now)
+        self._wheel.schedule(("sends", phone), now + self.send_window_seconds)
+
+        code = generate_code() if generate else None
+        expires = now + self.ttl_seconds
+        self._codes[(phone, purpose)] = [self._hash(phone, purpose, code) if code else None, expires, 0]
+        self._wheel.schedule(("code", phone, purpose), expires)
+        self.issued += 1
+        return code
+
+    async def verify(self, phone: str, purpose: str, code: str, check: Optional[CodeCheck] = None) -> bool:
+        now = time.monotonic()
+        self._expire(now)
+
+        key = (phone, purpose)
+        entry = self._codes.get(key)
+        if entry is None or entry[1] <= now:
+            self.rejected += 1
+            return False
+
+        entry[2] += 1
+        if entry[2] > self.max_attempts:
+            del self._codes[key]
+            self.locked_out += 1
+            return False
+
+        if entry[0] is not None:
+            valid = hmac.compare_digest(entry[0], self._hash(phone, purpose, str(code)))
+        else:
+            valid = check is not None and await check(phone, code, purpose)
+
+        if not valid:
+            self.rejected += 1
+            return False
+
+        if self._codes.get(key) is entry:
+            del self._codes[key]
+        self.verified += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "codes": len(self._codes), "phones": len(self._sends)}
+
+
+class PostgresOtpStore(OtpStore):
+    """
+    Store shared by all workers, in the `otp_codes` and `otp_sends` tables
+    (migrations/003_otp_store.sql). Verify is a primary-key UPDATE; issuing
+    takes a per-phone advisory lock so concurrent sends count correctly.
+    Expired rows are purged at most every `purge_interval_seconds`.
+    """
+
+    name = "postgres"
+
+    def __init__(self, secret: bytes, session_factory: Any, purge_interval_seconds: float = 60.0, **limits: Any):
+        super().__init__(secret, **limits)
+        self._session_factory = session_factory
+        self.purge_interval_seconds = purge_interval_seconds
+        self._last_purge = time.monotonic()
+
+    async def _purge(self, session) -> None:
+        await session.execute(text("DELETE FROM otp_codes WHERE expires_at <= NOW()"))
+        await session.execute(
+            text("DELETE FROM otp_sends WHERE sent_at <= NOW() - make_interval(secs => :window)"),
+            {"window": self.send_window_seconds}
+        )
+
+    async def issue(self, phone: str, purpose: str, generate: bool = True) -> Optional[str]:
+        code = generate_code() if generate else None
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:phone))"), {"phone": phone})
+
+                row = (await session.execute(text("""
+                    SELECT COUNT(*) AS sends,
+                           EXTRACT(EPOCH FROM NOW() - MIN(sent_at)) AS oldest_age,
+                           EXTRACT(EPOCH FROM NOW() - MAX(sent_at)) AS newest_age
+                    FROM otp_sends
+                    WHERE phone = :phone AND sent_at > NOW() - make_interval(secs => :window)
+                """), {"phone": phone, "window": self.send_window_seconds})).one()
+
+                retry_after = self._retry_after(
+                    row.sends,
+                    float(row.oldest_age) if row.oldest_age is not None else None,
+                    float(row.newest_age) if row.newest_age is not None else None
+                )
+                if retry_after:
+                    self.rate_limited += 1
+                    raise OtpRateLimited(retry_after)
+
+                await session.execute(text("INSERT INTO otp_sends (phone, sent_at) VALUES (:phone, NOW())"), {"phone": phone})
+                await session.execute(text("""
+                    INSERT INTO otp_codes (phone, purpose, code_hash, attempts, expires_at)
+                    VALUES (:phone, :purpose, :code_hash, 0, NOW() + make_interval(secs => :ttl))
+                    ON CONFLICT (phone, purpose) DO UPDATE
+                    SET code_hash = EXCLUDED.code_hash, attempts = 0, expires_at = EXCLUDED.expires_at
+                """), {
+                    "phone": phone,
+                    "purpose": purpose,
+                    "code_hash": self._hash(phone, purpose, code) if code else None,
+                    "ttl": self.ttl_seconds
+                })
+
+                if time.monotonic() - self._last_purge > self.purge_interval_seconds:
+                    self._last_purge = time.monotonic()
+                    await self._purge(session)
+
+        self.issued += 1
+        return code
+
+    async def verify(self, phone: str, purpose: str, code: str, check: Optional[CodeCheck] = None) -> bool:
+        params = {"phone": phone, "purpose": purpose}
+
+        async with self._session_factory() as session:
+            row = (await session.execute(text("""
+                UPDATE otp_codes SET attempts = attempts + 1
+                WHERE phone = :phone AND purpose = :purpose AND expires_at > NOW()
+                RETURNING code_hash, attempts
+            """), params)).first()
+
+            if row is None:
+                await session.commit()
+                self.rejected += 1
+                return False
+
+            if row.attempts > self.max_attempts:
+                await session.execute(text("DELETE FROM otp_codes WHERE phone = :phone AND purpose = :purpose"), params)
+                await session.commit()
+                self.locked_out += 1
+                return False
+
+            if row.code_hash is not None:
+                expected = self._hash(phone, purpose, str(code))
+                valid = hmac.compare_digest(bytes(row.code_hash), expected)
+                if valid:
+                    # Conditional delete: of two concurrent correct attempts only one consumes the code
+                    valid = (await session.execute(text("""
+                        DELETE FROM otp_codes
+                        WHERE phone = :phone AND purpose = :purpose AND code_hash = :code_hash
+                        RETURNING phone
+                    """), {**params, "code_hash": expected})).first() is not None
+                await session.commit()
+            else:
+                await session.commit()
+                valid = check is not None and await check(phone, code, purpose)
+                if valid:
+                    await session.execute(text("DELETE FROM otp_codes WHERE phone = :phone AND purpose = :purpose"), params)
+                    await session.commit()
+
+        if not valid:
+            self.rejected += 1
+            return False
+        self.verified += 1
+        return True
+
+
+def _build_store() -> OtpStore:
+    """OTP_STORE=memory (default) or postgres"""
+    name = os.getenv("OTP_STORE", "memory").lower()
+    limits = {
+        "ttl_seconds": float(os.getenv("OTP_TTL_SECONDS", "300")),
+        "max_attempts": int(os.getenv("OTP_MAX_VERIFY_ATTEMPTS", "5")),
+        "send_limit": int(os.getenv("OTP_SEND_LIMIT", "5")),
+        "send_window_seconds": float(os.getenv("OTP_SEND_WINDOW_SECONDS", "3600")),
+        "send_interval_seconds": float(os.getenv("OTP_SEND_INTERVAL_SECONDS", "60"))
+    }
+
+    secret = os.getenv("OTP_HASH_SECRET") or os.getenv("JWT_SECRET_KEY")
+    if secret is None and name == "postgres":
+        logger.warning("⚠️ OTP_HASH_SECRET is not set: codes only verify on the worker that issued them")
+    secret = secret.encode("utf-8") if secret else secrets.token_bytes(32)
+
+    if name == "postgres":
+        from ..async_database import AsyncSessionLocal
+        return PostgresOtpStore(secret, AsyncSessionLocal, **limits)
+    if name != "memory":
+        logger.warning(f"⚠️ Unknown OTP_STORE={name}, using memory")
+    return MemoryOtpStore(secret, **limits)
+
+
+otp_store = _build_store()
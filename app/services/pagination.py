@@ -0,0 +1,62 @@
+"""
+Keyset pagination helpers
+Opaque cursor tokens for "seek" pagination over (sort value, primary key)
+and the `count=exact|estimated|none` totals reported in Content-Range
+"""
+from typing import Any, List, Optional
+import base64
+import json
+
+
+class InvalidCursorError(ValueError):
+    """Cursor token could not be decoded"""
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack the key of the last returned row into an opaque URL-safe token"""
+    payload = json.dumps([str(value) if value is not None else None for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Unpack a token produced by `encode_cursor` with `size` values"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Invalid cursor: unexpected shape")
+
+    return values
+
+
+# `count` query parameter values (validated with Query(pattern=COUNT_PATTERN))
+COUNT_PATTERN = "^(exact|estimated|none)$"
+
+# Estimates below this are replaced by an exact count: cheap there, and
+# reltuples / planner numbers are least reliable for small or fresh tables
+EXACT_COUNT_BELOW = 1000
+
+
+def plan_rows(explain_result: Any) -> Optional[int]:
+    """Top-level row estimate from `EXPLAIN (FORMAT JSON)` output (parsed or raw JSON text)"""
+    if isinstance(explain_result, str):
+        explain_result = json.loads(explain_result)
+    try:
+        return int(explain_result[0]["Plan"]["Plan Rows"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def content_range(first: Optional[int], count: int, total: Optional[int]) -> str:
+    """
+    Content-Range value for a list response, e.g. `0-24/3573`.
+
+    `first` is the offset of the first row when known (None for cursor pages
+    after the first); `total` is None when the client did not ask for a count.
+    """
+    rows = f"{first}-{first + count - 1}" if first is not None and count else "*"
+    return f"{rows}/{total if total is not None else '*'}"
@@ -0,0 +1,153 @@
+"""
+Password hashing service
+Runs bcrypt off the event loop in a bounded worker pool with queue metrics
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+import bcrypt
+
+from ..auth_utils import verify_password as verify_legacy_password
+
+# bcrypt only uses the first 72 bytes of a password (and bcrypt>=5 refuses longer ones)
+MAX_PASSWORD_BYTES = 72
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashing jobs are already waiting"""
+    pass
+
+
+class PasswordTooLong(ValueError):
+    """Password is longer than bcrypt can hash"""
+    pass
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing on a dedicated thread pool.
+
+    bcrypt releases the GIL while it works, so threads keep the event loop
+    free and run hashes in parallel. At most `workers` hashes run at once;
+    jobs beyond that wait in a queue of at most `max_queue` and further calls
+    raise PasswordHasherBusy instead of piling up.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 4, max_queue: int = 64):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def _run(self, func, *args) -> Any:
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.total_wait_seconds += started - submitted
+                    self.total_run_seconds += finished - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def _hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("ascii")
+
+    @staticmethod
+    def _verify_sync(password: str, hashed: str) -> bool:
+        if not hashed:
+            return False
+        if not hashed.startswith("$2"):
+            # Hash written by an older scheme: keep accepting it until rehashed
+            return verify_legacy_password(password, hashed)
+        try:
+            return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("ascii"))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when a stored hash is not bcrypt at the configured cost"""
+        parts = hashed.split("$")
+        # $2b$<rounds>$<salt+hash>
+        if len(parts) != 4 or not parts[1].startswith("2"):
+            return True
+        try:
+            return int(parts[2]) != self.rounds
+        except ValueError:
+            return True
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password at the configured cost (PasswordTooLong past 72 UTF-8 bytes)"""
+        if len(password.encode("utf-8")) > MAX_PASSWORD_BYTES:
+            raise PasswordTooLong()
+        return await self._run(self._hash_sync, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self._verify_sync, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and, when it is correct but the stored hash uses
+        another cost or scheme, return a fresh hash to store (else None).
+        """
+        if not await self.verify(password, hashed):
+            return False, None
+        if not self.needs_rehash(hashed):
+            return True, None
+
+        new_hash = await self.hash(password)
+        with self._lock:
+            self.rehashed += 1
+        return True, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool and queue counters for monitoring endpoints"""
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - self.workers, 0),
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self.total_run_seconds / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12")),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+)
@@ -0,0 +1,112 @@
+"""
+Reference data business logic service
+Resolves reference categories (data_categories / reference_values) for onboarding fields
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import List, Dict, Any, Iterable
+import hashlib
+import logging
+import os
+
+from .cache import TTLCache
+from .serializers import infer_columns, serialize_rows
+
+logger = logging.getLogger(__name__)
+
+# Options per category live long; the version stamp is re-read more often and
+# makes entries of an older stamp unreachable once reference data changes
+reference_cache = TTLCache(
+    "reference",
+    ttl_seconds=float(os.getenv("REFERENCE_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "512"))
+)
+REFERENCE_VERSION_TTL = float(os.getenv("REFERENCE_VERSION_TTL", "30"))
+
+class ReferenceService:
+    """Service class for reference data operations"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_version(self) -> str:
+        """Version stamp of all reference data"""
+        found, stamp = reference_cache.get(("version",))
+        if found:
+            return stamp
+        
+        try:
+            row = (await self.db.execute(text("""
+                SELECT
+                    (SELECT COUNT(*) FROM data_categories) AS categories_count,
+                    (SELECT MAX(updated_at) FROM data_categories) AS categories_updated_at,
+                    (SELECT COUNT(*) FROM reference_values) AS values_count,
+                    (SELECT MAX(updated_at) FROM reference_values) AS values_updated_at
+            """))).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Error fetching reference data version: {str(e)}")
+            raise
+        
+        stamp = hashlib.sha1("|".join(str(value) for value in row).encode()).hexdigest()[:16]
+        reference_cache.set(("version",), stamp, ttl_seconds=REFERENCE_VERSION_TTL)
+        return stamp
+    
+    async def resolve_categories(self, codes: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get active options for many category codes at once.
+        
+        Cached codes are served from memory; the rest are loaded with a single
+        `= ANY(:codes)` query. Unknown codes map to an empty list.
+        """
+        codes = list(dict.fromkeys(code for code in codes if code))
+        if not codes:
+            return {}
+        
+        version = await self.get_version()
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        missing = []
+        for code in codes:
+            found, options = reference_cache.get(("options", version, code))
+            if found:
+                resolved[code] = options
+            else:
+                missing.append(code)
+        
+        if missing:
+            try:
+                result = await self.db.execute(text("""
+                    SELECT dc.code AS category_code, rv.*
+                    FROM reference_values rv
+                    JOIN data_categories dc ON rv.category_id = dc.id
+                    WHERE dc.code = ANY(:codes) AND rv.is_active = true
+                    ORDER BY dc.code, rv.sort_order
+                """), {"codes": missing})
+                keys = list(result.keys())
+                rows = result.fetchall()
+            except Exception as e:
+                logger.error(f"❌ Error resolving reference categories: {str(e)}")
+                raise
+            
+            loaded: Dict[str, List[Dict[str, Any]]] = {code: [] for code in missing}
+            for option in serialize_rows(infer_columns(keys, rows), rows):
+                loaded[option.pop("category_code")].append(option)
+            
+            for code, options in loaded.items():
+                reference_cache.set(("options", version, code), options)
+            resolved.update(loaded)
+        
+        return resolved
+    
+    async def embed_options(self, fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return copies of onboarding fields with their reference options under `options`"""
+        options_by_code = await self.resolve_categories(field.get("reference_category_code") for field in fields)
+        return [
+            {**field, "options": options_by_code.get(field["reference_category_code"])}
+            if field.get("reference_category_code") else field
+            for field in fields
+        ]
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Hit/miss counters of the reference cache"""
+        return reference_cache.stats()
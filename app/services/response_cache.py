@@ -0,0 +1,126 @@
+"""
+Response cache for the generic table endpoint
+Rendered list responses of opted-in tables, dropped when the table is written
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, Hashable, Iterable, Set, Tuple
+import logging
+import os
+import re
+import threading
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+table_response_cache = TTLCache(
+    "table_responses",
+    ttl_seconds=float(os.getenv("TABLE_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("TABLE_CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("TABLE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+)
+
+# Table write counters: a response computed before a write must not be stored after it
+_generations: Dict[str, int] = {}
+_generations_lock = threading.Lock()
+
+# Target tables of INSERT / UPDATE / DELETE statements (ORM flushes and raw text() alike)
+_WRITE_TARGET = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(?:"?\w+"?\.)?"?(\w+)"?',
+    re.IGNORECASE
+)
+
+_installed = False
+
+
+def response_cache_key(table_name: str, params: Iterable[Tuple[str, str]]) -> Tuple[Hashable, ...]:
+    """Normalized key: parameter order and whitespace around `select` items do not matter"""
+    normalized = []
+    for key, value in params:
+        if key == "select":
+            value = ",".join(item.strip() for item in value.split(","))
+        normalized.append((key, value))
+    return (table_name, tuple(sorted(normalized)))
+
+
+def get_generation(table_name: str) -> int:
+    """Current write counter of a table (read before running the query)"""
+    return _generations.get(table_name, 0)
+
+
+def store_response(
+    key: Tuple[Hashable, ...],
+    table_name: str,
+    generation: int,
+    value: Any,
+    size: int,
+    ttl_seconds: float
+) -> None:
+    """Cache a rendered response unless the table was written since `generation` was read"""
+    with _generations_lock:
+        if _generations.get(table_name, 0) != generation:
+            return
+        table_response_cache.set(key, value, tag=table_name, ttl_seconds=ttl_seconds, size=size)
+
+
+def invalidate_tables(table_names: Iterable[str]) -> int:
+    """Drop cached responses of tables and bump their write counters"""
+    table_names = set(table_names)
+    with _generations_lock:
+        for name in table_names:
+            _generations[name] = _generations.get(name, 0) + 1
+        removed = table_response_cache.invalidate(table_names)
+    if removed:
+        logger.info(f"🧹 Table response cache: dropped {removed} entries for {', '.join(sorted(table_names))}")
+    return removed
+
+
+def tables_written(statement: str) -> Set[str]:
+    """Tables an SQL statement writes to"""
+    return {match.lower() for match in _WRITE_TARGET.findall(statement)}
+
+
+def install_write_invalidation(cached_tables: Iterable[str]) -> None:
+    """
+    Invalidate cached responses when a cached table is written through any engine.
+
+    Written tables are collected per connection and invalidated on commit
+    (discarded on rollback). A read that started before the commit does not
+    re-cache its rows because store_response checks the table's write
+    counter; anything else that slips through is bounded by the TTL.
+    """
+    global _installed
+    watched = set(cached_tables)
+    if _installed or not watched:
+        return
+
+    def _pending(conn) -> Set[str]:
+        return conn.info.setdefault("response_cache_pending", set())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _collect_writes(conn, cursor, statement, parameters, context, executemany):
+        written = tables_written(statement) & watched
+        if written:
+            if conn.in_transaction():
+                _pending(conn).update(written)
+            else:
+                invalidate_tables(written)
+
+    @event.listens_for(Engine, "commit")
+    def _invalidate_on_commit(conn):
+        pending = conn.info.pop("response_cache_pending", None)
+        if pending:
+            invalidate_tables(pending)
+
+    @event.listens_for(Engine, "rollback")
+    def _discard_on_rollback(conn):
+        conn.info.pop("response_cache_pending", None)
+
+    _installed = True
+    logger.info(f"✅ Table response cache watching writes to: {', '.join(sorted(watched))}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit ratio and size of the table response cache"""
+    return table_response_cache.stats()
@@ -0,0 +1,89 @@
+"""
+Row serializer registry
+Generates one row -> dict function per query shape and reuses it
+"""
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import threading
+import uuid
+
+# Column conversions understood by the generated code
+UUID = "uuid"      # str(value)
+ISO = "iso"        # value.isoformat() for datetime / date / time
+
+ColumnSpec = Tuple[str, Optional[str]]
+RowSerializer = Callable[[Any], Dict[str, Any]]
+
+_CONVERSIONS = {
+    None: "{var}",
+    UUID: "str({var}) if {var} is not None else None",
+    ISO: "{var}.isoformat() if {var} is not None else None",
+}
+
+_registry: Dict[Tuple[ColumnSpec, ...], RowSerializer] = {}
+_registry_lock = threading.Lock()
+
+
+def _compile(columns: Tuple[ColumnSpec, ...]) -> RowSerializer:
+    """Build the source of a specialised serializer and exec it once"""
+    lines = ["def serialize(row):"]
+    items = []
+    for index, (name, conversion) in enumerate(columns):
+        if conversion not in _CONVERSIONS:
+            raise ValueError(f"Unknown conversion {conversion!r} for column {name!r}")
+        if not name.isidentifier():
+            raise ValueError(f"Invalid column name {name!r}")
+        var = f"v{index}"
+        lines.append(f"    {var} = row.{name}")
+        items.append(f"{name!r}: {_CONVERSIONS[conversion].format(var=var)}")
+    lines.append("    return {" + ", ".join(items) + "}")
+
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["serialize"]
+
+
+def get_serializer(columns: Sequence[ColumnSpec]) -> RowSerializer:
+    """
+    Get the serializer for a query shape.
+
+    Args:
+        columns: (column_name, conversion) pairs in output order; conversion is
+            UUID, ISO or None for values that are already JSON-friendly
+
+    Returns:
+        Function that turns a result row (attribute access) into a dict
+    """
+    key = tuple(columns)
+    serializer = _registry.get(key)
+    if serializer is None:
+        with _registry_lock:
+            serializer = _registry.get(key)
+            if serializer is None:
+                serializer = _compile(key)
+                _registry[key] = serializer
+    return serializer
+
+
+def serialize_rows(columns: Sequence[ColumnSpec], rows) -> list:
+    """Serialize all rows of one query shape"""
+    serializer = get_serializer(columns)
+    return [serializer(row) for row in rows]
+
+
+def infer_columns(keys: Sequence[str], rows: Sequence[Any]) -> Tuple[ColumnSpec, ...]:
+    """Derive a column shape for queries whose columns are not known up front (SELECT *)"""
+    columns = []
+    for key in keys:
+        conversion = None
+        for row in rows:
+            value = getattr(row, key)
+            if value is None:
+                continue
+            if isinstance(value, uuid.UUID):
+                conversion = UUID
+            elif isinstance(value, (datetime, date, time)):
+                conversion = ISO
+            break
+        columns.append((key, conversion))
+    return tuple(columns)
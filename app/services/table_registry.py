@@ -0,0 +1,138 @@
+"""
+Model registry for the generic table endpoint
+Built once at startup: table name -> model, column metadata and row serializer
+"""
+from sqlalchemy import Date, DateTime, Time, Uuid
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.exc import NoReferenceError
+from typing import Any, Dict, Optional, Sequence, Tuple
+import logging
+import os
+
+from ..responses import FAST_JSON
+from .serializers import ISO, UUID, ColumnSpec, RowSerializer, get_serializer
+
+logger = logging.getLogger(__name__)
+
+
+def _conversion_for(column) -> Optional[str]:
+    """Serializer conversion for a column type (none needed when orjson encodes the response)"""
+    if FAST_JSON:
+        return None
+    if isinstance(column.type, (DateTime, Date, Time)):
+        return ISO
+    if isinstance(column.type, (PG_UUID, Uuid)):
+        return UUID
+    return None
+
+
+class Relation:
+    """Foreign key link from one exposed table to another, usable as an embed"""
+
+    def __init__(self, target: "TableInfo", local_column: str, remote_column: str, many: bool):
+        self.target = target
+        self.local_column = local_column      # column on the embedding table
+        self.remote_column = remote_column    # column on the embedded table
+        self.many = many                      # one-to-many embeds a list, many-to-one an object
+
+
+class TableInfo:
+    """Everything list_rows needs about one exposed table"""
+
+    def __init__(self, name: str, model: Any, cache_ttl: Optional[float] = None):
+        self.name = name
+        self.model = model
+        # Seconds list responses may be served from the response cache (None: not cached)
+        self.cache_ttl = cache_ttl
+        self.table = model.__table__
+        self.columns = {column.name: column for column in self.table.columns}
+        self.primary_key = tuple(column.name for column in self.table.primary_key.columns)
+        self.column_specs: Tuple[ColumnSpec, ...] = tuple(
+            (column.name, _conversion_for(column)) for column in self.table.columns
+        )
+        self.serializer: RowSerializer = get_serializer(self.column_specs)
+        self._specs_by_name = dict(self.column_specs)
+        # Embeddable tables by name (filled by link_relations); None marks an ambiguous link
+        self.relations: Dict[str, Optional[Relation]] = {}
+
+    def serializer_for(self, names: Sequence[str]) -> RowSerializer:
+        """Serializer for a subset of columns (shared through the serializer registry)"""
+        return get_serializer(tuple((name, self._specs_by_name[name]) for name in names))
+
+
+_registry: Dict[str, TableInfo] = {}
+
+# Near-static tables whose list responses are the same for every user (opt-in response cache)
+_CACHED_TABLES = {
+    "nanny_services": float(os.getenv("TABLE_CACHE_TTL", "300")),
+    "certificates": float(os.getenv("TABLE_CACHE_TTL", "300")),
+}
+
+
+def _exposed_models() -> Dict[str, Any]:
+    # Imported lazily: models pull in the database setup
+    from ..models import (
+        Profile, UserRole, ProfilePhoto, Nanny, NannyService, NannyEducation,
+        NannyLanguage, NannyAgeExperience, Certificate, SavedParent, Parent,
+        ParentChild, ParentRequirement, SavedNanny, Booking, Review
+    )
+
+    return {
+        "profiles": Profile,
+        "user_roles": UserRole,
+        "profile_photos": ProfilePhoto,
+        "nannies": Nanny,
+        "nanny_services": NannyService,
+        "nanny_education": NannyEducation,
+        "nanny_languages": NannyLanguage,
+        "nanny_age_experience": NannyAgeExperience,
+        "certificates": Certificate,
+        "saved_parents": SavedParent,
+        "parents": Parent,
+        "parent_children": ParentChild,
+        "parent_requirements": ParentRequirement,
+        "saved_nannies": SavedNanny,
+        "bookings": Booking,
+        "reviews": Review,
+    }
+
+
+def _add_relation(info: TableInfo, name: str, relation: Relation) -> None:
+    # Two foreign keys between the same tables cannot be told apart by table name
+    info.relations[name] = None if name in info.relations else relation
+
+
+def link_relations(registry: Dict[str, TableInfo]) -> None:
+    """Derive embeddable relations from single-column foreign keys between exposed tables"""
+    by_table = {info.table: info for info in registry.values()}
+    for child in registry.values():
+        for fk in child.table.foreign_keys:
+            try:
+                parent = by_table.get(fk.column.table)
+            except NoReferenceError:
+                # Points at a table outside the models' metadata
+                continue
+            if parent is None or parent is child:
+                continue
+            _add_relation(parent, child.name, Relation(child, fk.column.name, fk.parent.name, many=True))
+            _add_relation(child, parent.name, Relation(parent, fk.parent.name, fk.column.name, many=False))
+
+
+def build_registry() -> Dict[str, TableInfo]:
+    """Build the registry (called from application startup)"""
+    registry = {
+        name: TableInfo(name, model, _CACHED_TABLES.get(name))
+        for name, model in _exposed_models().items()
+    }
+    link_relations(registry)
+    _registry.clear()
+    _registry.update(registry)
+    logger.info(f"✅ Table registry built: {len(_registry)} tables")
+    return _registry
+
+
+def get_table(name: str) -> Optional[TableInfo]:
+    """Look up an exposed table (builds the registry on first use if startup did not)"""
+    if not _registry:
+        build_registry()
+    return _registry.get(name)
@@ -0,0 +1,479 @@
+"""
+Generic table business logic service
+Builds and runs list queries for the /api/v1/{table_name} endpoint
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, not_, or_, select, text, tuple_
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import List, Dict, Optional, Any, Iterator, Sequence, Set, Tuple, Union
+import csv
+import io
+import logging
+import uuid
+
+from ..responses import dumps
+from .pagination import EXACT_COUNT_BELOW, InvalidCursorError, decode_cursor, encode_cursor, plan_rows
+from .table_registry import Relation, TableInfo
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per round trip in export mode
+EXPORT_BATCH_SIZE = 1000
+
+
+class TableQueryError(ValueError):
+    """Request parameters that do not fit the table (mapped to 400 by the router)"""
+
+
+def _parse_key_value(column, raw: Optional[str]) -> Any:
+    """Turn a cursor string back into the column's Python type"""
+    if raw is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is date:
+        return date.fromisoformat(raw)
+    if python_type is time:
+        return time.fromisoformat(raw)
+    if python_type is uuid.UUID:
+        return uuid.UUID(raw)
+    if python_type is bool:
+        return raw == "True"
+    if python_type in (int, float, Decimal):
+        return python_type(raw)
+    return raw
+
+
+def _parse_filter_value(column, raw: str) -> Any:
+    """Filter value in the column's Python type (booleans also accept true/false)"""
+    try:
+        if column.type.python_type is bool:
+            if raw.lower() in ("true", "false"):
+                return raw.lower() == "true"
+            raise ValueError(raw)
+    except NotImplementedError:
+        pass
+    return _parse_key_value(column, raw)
+
+
+def _in_filter(column, raw: str):
+    values = raw[1:-1] if raw.startswith("(") and raw.endswith(")") else raw
+    return column.in_([_parse_filter_value(column, value) for value in values.split(",")])
+
+
+def _is_filter(column, raw: str):
+    literal = {"null": None, "true": True, "false": False}
+    if raw.lower() not in literal:
+        raise ValueError(raw)
+    return column.is_(literal[raw.lower()])
+
+
+def _like_filter(case_insensitive: bool):
+    def condition(column, raw: str):
+        try:
+            is_text = column.type.python_type is str
+        except NotImplementedError:
+            is_text = False
+        if not is_text:
+            raise TableQueryError(f"{'ilike' if case_insensitive else 'like'} needs a text column: {column.name}")
+        pattern = raw.replace("*", "%")
+        return column.ilike(pattern) if case_insensitive else column.like(pattern)
+    return condition
+
+
+# operator -> (column, raw value) -> SQL condition; `*` is the like wildcard as in PostgREST
+FILTER_OPERATORS = {
+    "eq": lambda column, raw: column == _parse_filter_value(column, raw),
+    "neq": lambda column, raw: column != _parse_filter_value(column, raw),
+    "gt": lambda column, raw: column > _parse_filter_value(column, raw),
+    "gte": lambda column, raw: column >= _parse_filter_value(column, raw),
+    "lt": lambda column, raw: column < _parse_filter_value(column, raw),
+    "lte": lambda column, raw: column <= _parse_filter_value(column, raw),
+    "like": _like_filter(case_insensitive=False),
+    "ilike": _like_filter(case_insensitive=True),
+    "in": _in_filter,
+    "is": _is_filter,
+}
+
+
+def _csv_value(value: Any) -> Any:
+    """CSV cell: nested values as JSON, temporal values in ISO format"""
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode("utf-8")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _split_select(select_param: str) -> List[str]:
+    """Split a select list on top-level commas (embeds keep their parentheses)"""
+    tokens, depth, current = [], 0, []
+    for char in select_param:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                raise TableQueryError("Unbalanced parentheses in select")
+        if char == "," and depth == 0:
+            tokens.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if depth:
+        raise TableQueryError("Unbalanced parentheses in select")
+    tokens.append("".join(current).strip())
+    for token in tokens:
+        if "(" in token and not token.endswith(")"):
+            raise TableQueryError(f"Invalid select item: {token}")
+    return [token for token in tokens if token]
+
+
+class Projection:
+    """Parsed `select`: columns to return plus embedded tables"""
+
+    def __init__(self, names: Tuple[str, ...], embeds: Dict[str, Tuple[Relation, "Projection"]]):
+        self.names = names
+        self.embeds = embeds
+
+    def fetch_names(self, extra: Sequence[str] = ()) -> Tuple[str, ...]:
+        """Columns to fetch: the selected ones plus join/cursor keys not selected"""
+        keys = list(extra) + [relation.local_column for relation, _ in self.embeds.values()]
+        return self.names + tuple(dict.fromkeys(name for name in keys if name not in self.names))
+
+    def output_names(self) -> Tuple[str, ...]:
+        return self.names + tuple(self.embeds)
+
+
+class TableService:
+    """Service class for generic table reads"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def parse_order(info: TableInfo, order_by: Optional[str]) -> Tuple[Optional[str], bool]:
+        """Parse `column[:asc|desc]`; unknown columns are ignored as before"""
+        if not order_by:
+            return None, False
+        parts = order_by.split(":")
+        column = parts[0]
+        descending = len(parts) > 1 and parts[1] == "desc"
+        if column not in info.columns:
+            return None, False
+        return column, descending
+
+    @staticmethod
+    def parse_select(info: TableInfo, select_param: Optional[str]) -> Projection:
+        """
+        Parse `col1,col2,related_table(col3,*)` against the registry.
+
+        Empty or `*` means every column; embedded tables (nestable) must be
+        linked to `info` by a foreign key. Unknown names raise TableQueryError.
+        """
+        if not select_param or not select_param.strip():
+            return Projection(tuple(info.columns), {})
+
+        names: List[str] = []
+        embeds: Dict[str, Tuple[Relation, Projection]] = {}
+        for token in _split_select(select_param):
+            if token == "*":
+                names.extend(info.columns)
+            elif "(" in token:
+                name = token[:token.index("(")].strip()
+                if name not in info.relations:
+                    raise TableQueryError(f"No relation between {info.name} and {name}")
+                relation = info.relations[name]
+                if relation is None:
+                    raise TableQueryError(f"Relation between {info.name} and {name} is ambiguous")
+                inner = token[token.index("(") + 1:-1]
+                embeds[name] = (relation, TableService.parse_select(relation.target, inner or "*"))
+            elif token not in info.columns:
+                raise TableQueryError(f"Unknown column(s) in select: {token}")
+            else:
+                names.append(token)
+        return Projection(tuple(dict.fromkeys(names)), embeds)
+
+    @staticmethod
+    def parse_filters(info: TableInfo, params: Sequence[Tuple[str, str]]) -> List[Any]:
+        """
+        Compile query-string filters into SQL conditions (ANDed together).
+
+        Accepts PostgREST-style `column=op.value` (`age=gte.3`, `name=ilike.*anna*`,
+        `deleted_at=is.null`, `status=in.(new,paid)`, `not.` negates) and the
+        older `column__op=value`. A range is two params on the same column
+        (`price=gte.100&price=lt.500`). Unknown columns, operators or values
+        that do not fit the column type raise TableQueryError.
+        """
+        conditions = []
+        for key, raw in params:
+            if "__" in key:
+                name, operator = key.split("__", 1)
+                negate, value = False, raw
+            else:
+                name = key
+                negate = raw.startswith("not.")
+                operator, separator, value = raw[4 if negate else 0:].partition(".")
+                if not separator:
+                    raise TableQueryError(f"Filter {key} must look like {key}=<operator>.<value>")
+
+            column = info.columns.get(name)
+            if column is None:
+                raise TableQueryError(f"Unknown filter column: {name}")
+            if operator not in FILTER_OPERATORS:
+                raise TableQueryError(f"Unknown filter operator: {operator}")
+
+            try:
+                condition = FILTER_OPERATORS[operator](column, value)
+            except TableQueryError:
+                raise
+            except (TypeError, ValueError, ArithmeticError):
+                raise TableQueryError(f"Invalid value for {name}: {value}")
+            conditions.append(not_(condition) if negate else condition)
+        return conditions
+
+    @staticmethod
+    def _filtered_query(info: TableInfo, conditions: Sequence[Any], names: Sequence[str]):
+        """SELECT of the given columns with the compiled filter conditions applied"""
+        query = select(*(info.columns[name] for name in names))
+        if conditions:
+            query = query.where(*conditions)
+        return query
+
+    def _keyset_condition(self, info: TableInfo, order_column: Optional[str], descending: bool, cursor: str):
+        """WHERE clause that seeks past the row a cursor points at"""
+        pk_columns = [info.columns[name] for name in info.primary_key]
+        values = decode_cursor(cursor, 3 + len(pk_columns))
+        cursor_column, cursor_direction, raw_value = values[:3]
+        if cursor_column != (order_column or "") or cursor_direction != ("desc" if descending else "asc"):
+            raise InvalidCursorError("Invalid cursor: order_by changed between pages")
+
+        try:
+            pk_values = [_parse_key_value(column, raw) for column, raw in zip(pk_columns, values[3:])]
+            if order_column is None:
+                return tuple_(*pk_columns) < tuple(pk_values) if descending else tuple_(*pk_columns) > tuple(pk_values)
+
+            column = info.columns[order_column]
+            value = _parse_key_value(column, raw_value)
+        except (TypeError, ValueError, ArithmeticError):
+            raise InvalidCursorError("Invalid cursor: bad key values")
+
+        pk_after = tuple_(*pk_columns) < tuple(pk_values) if descending else tuple_(*pk_columns) > tuple(pk_values)
+
+        # NULLs sort last ascending and first descending (Postgres default)
+        if value is None:
+            if descending:
+                return or_(column.is_not(None), and_(column.is_(None), pk_after))
+            return and_(column.is_(None), pk_after)
+
+        key = tuple_(column, *pk_columns)
+        after = key < (value, *pk_values) if descending else key > (value, *pk_values)
+        if not descending and column.nullable:
+            return or_(after, column.is_(None))
+        return after
+
+    def list_rows(
+        self,
+        info: TableInfo,
+        conditions: Sequence[Any],
+        order_by: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        select_param: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List rows of a registered table matching `conditions` (from parse_filters).
+
+        Only the columns named in `select_param` are fetched and serialized;
+        embedded tables cost one extra query each (see _serialize). When `cursor` is not None (an empty string starts from the first page)
+        rows are ordered by the order column plus primary key and the returned
+        next cursor continues after the last row, so every page costs the same
+        index seek. Returns (rows, next_cursor).
+        """
+        projection = self.parse_select(info, select_param)
+        order_column, descending = self.parse_order(info, order_by)
+        paginate = cursor is not None
+
+        # Cursor keys are fetched even when the client did not select them
+        key_names = ((order_column,) if order_column else ()) + tuple(
+            name for name in info.primary_key if name != order_column
+        )
+        query = self._filtered_query(info, conditions, projection.fetch_names(key_names if paginate else ()))
+
+        if paginate and cursor:
+            query = query.where(self._keyset_condition(info, order_column, descending, cursor))
+
+        # Apply ordering (primary key breaks ties so pages never overlap)
+        if order_column:
+            column = info.columns[order_column]
+            if paginate:
+                # Explicit NULL placement matches what _keyset_condition assumes
+                query = query.order_by(column.desc().nulls_first() if descending else column.asc().nulls_last())
+            else:
+                query = query.order_by(column.desc() if descending else column)
+        if paginate:
+            for name in info.primary_key:
+                if name != order_column:
+                    column = info.columns[name]
+                    query = query.order_by(column.desc() if descending else column)
+
+        query = query.limit(limit + 1 if paginate else limit)
+
+        try:
+            rows = self.db.execute(query).all()
+        except Exception as e:
+            logger.error(f"❌ Error listing {info.name}: {str(e)}")
+            raise
+
+        next_cursor = None
+        if paginate and len(rows) > limit:
+            rows = rows[:limit]
+            last = info.serializer_for(key_names)(rows[-1])
+            next_cursor = encode_cursor(
+                order_column or "",
+                "desc" if descending else "asc",
+                last[order_column] if order_column else None,
+                *(last[name] for name in info.primary_key)
+            )
+
+        return self._serialize(info, projection, rows), next_cursor
+
+    def _serialize(self, info: TableInfo, projection: Projection, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Serialize rows and attach embedded tables.
+
+        Each embed is loaded with a single `remote IN (keys of these rows)`
+        query (recursively for nested embeds), so the number of queries
+        depends on the select, never on the number of rows.
+        """
+        serializer = info.serializer_for(projection.names)
+        data = [serializer(row) for row in rows]
+
+        for name, (relation, sub_projection) in projection.embeds.items():
+            keys = {getattr(row, relation.local_column) for row in rows}
+            keys.discard(None)
+            grouped = self._load_embedded(relation, sub_projection, keys) if keys else {}
+            for row, item in zip(rows, data):
+                matches = grouped.get(getattr(row, relation.local_column), [])
+                if relation.many:
+                    item[name] = matches
+                else:
+                    item[name] = matches[0] if matches else None
+
+        return data
+
+    def _load_embedded(self, relation: Relation, projection: Projection, keys: Set[Any]) -> Dict[Any, List[Dict[str, Any]]]:
+        """Rows of an embedded table grouped by the join column"""
+        target = relation.target
+        remote = target.columns[relation.remote_column]
+        query = self._filtered_query(target, [remote.in_(keys)], projection.fetch_names([relation.remote_column]))
+        query = query.order_by(*(target.columns[name] for name in target.primary_key))
+
+        try:
+            rows = self.db.execute(query).all()
+        except Exception as e:
+            logger.error(f"❌ Error embedding {target.name}: {str(e)}")
+            raise
+
+        grouped: Dict[Any, List[Dict[str, Any]]] = {}
+        for row, item in zip(rows, self._serialize(target, projection, rows)):
+            grouped.setdefault(getattr(row, relation.remote_column), []).append(item)
+        return grouped
+
+    def count_rows(self, info: TableInfo, conditions: Sequence[Any], mode: str) -> Optional[int]:
+        """
+        Total rows matching `conditions` for the Content-Range header.
+
+        `exact` runs COUNT(*); `estimated` reads pg_class.reltuples (no
+        filters) or the planner's row estimate (filters) and only falls back to
+        COUNT(*) when the estimate is small or unavailable; `none` skips it.
+        """
+        if mode == "none":
+            return None
+
+        try:
+            estimate = None
+            if mode == "estimated" and self.db.get_bind().dialect.name == "postgresql":
+                estimate = self._estimate_rows(info, conditions)
+            if estimate is not None and estimate >= EXACT_COUNT_BELOW:
+                return estimate
+
+            query = select(func.count()).select_from(info.table)
+            if conditions:
+                query = query.where(*conditions)
+            return self.db.execute(query).scalar_one()
+        except Exception as e:
+            logger.error(f"❌ Error counting {info.name}: {str(e)}")
+            raise
+
+    def _estimate_rows(self, info: TableInfo, conditions: Sequence[Any]) -> Optional[int]:
+        """Postgres row estimate without scanning the table"""
+        if not conditions:
+            table_name = f"{info.table.schema}.{info.table.name}" if info.table.schema else info.table.name
+            estimate = self.db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                {"table_name": table_name}
+            ).scalar()
+            # reltuples is -1 until the table is first vacuumed/analyzed
+            return estimate if estimate is not None and estimate >= 0 else None
+
+        compiled = select(*info.table.primary_key.columns).where(*conditions).compile(
+            dialect=self.db.get_bind().dialect,
+            compile_kwargs={"render_postcompile": True}
+        )
+        result = self.db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        return plan_rows(result.scalar())
+
+    def stream_rows(
+        self,
+        info: TableInfo,
+        conditions: Sequence[Any],
+        order_by: Optional[str] = None,
+        export_format: str = "ndjson",
+        select_param: Optional[str] = None
+    ) -> Iterator[Union[str, bytes]]:
+        """
+        Stream every matching row (selected columns only) as NDJSON lines or CSV.
+
+        Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE and
+        are encoded one batch at a time (embeds are loaded per batch), so
+        memory stays flat whatever the table size. Meant for StreamingResponse
+        (iterated in a worker thread).
+        """
+        projection = self.parse_select(info, select_param)
+        query = self._filtered_query(info, conditions, projection.fetch_names())
+        order_column, descending = self.parse_order(info, order_by)
+        if order_column:
+            column = info.columns[order_column]
+            query = query.order_by(column.desc() if descending else column)
+
+        result = self.db.execute(
+            query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        try:
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(projection.output_names())
+                for batch in result.partitions():
+                    for item in self._serialize(info, projection, batch):
+                        writer.writerow(_csv_value(value) for value in item.values())
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue()
+            else:
+                for batch in result.partitions():
+                    yield b"".join(
+                        dumps(item) + b"\n" for item in self._serialize(info, projection, batch)
+                    )
+        finally:
+            result.close()
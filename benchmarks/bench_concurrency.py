@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: requests/sec a single uvicorn worker sustains
+Start one worker (uvicorn app.main:app --workers 1) on the code to measure,
+then run: python benchmarks/bench_concurrency.py --url http://localhost:8000
+Run it once on the sync-session build and once on the async build to compare.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/v1/onboarding/configs/parent",
+    "/api/v1/onboarding/steps/parent",
+    "/api/v1/onboarding/tree/parent",
+    "/api/v1/onboarding_configs?is_active=true",
+]
+
+
+async def worker(client: httpx.AsyncClient, paths, deadline: float, latencies: list, errors: list, token):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, paths, concurrency: int, duration: float, token):
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            worker(client, paths, deadline, latencies, errors, token) for _ in range(concurrency)
+        ))
+
+    if not latencies:
+        print("No successful requests")
+        return
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"concurrency={concurrency} duration={duration:.0f}s")
+    print(f"requests:  {len(latencies)}  errors: {len(errors)}")
+    print(f"req/s:     {len(latencies) / duration:,.1f}")
+    print(f"p50:       {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"p99:       {p99 * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--token", help="Bearer token for authenticated paths")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.paths, args.concurrency, args.duration, args.token))
+
+
+if __name__ == "__main__":
+    main()
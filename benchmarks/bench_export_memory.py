@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Memory check: streaming export keeps RSS flat on a 1M-row table
+Builds a synthetic SQLite table, streams it through TableService.stream_rows
+(NDJSON and CSV) and compares peak RSS growth with fully materializing it.
+Run from the repository root: python benchmarks/bench_export_memory.py [rows]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine, func, insert, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.services.table_registry import TableInfo
+from app.services.table_service import TableService
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+MAX_STREAM_GROWTH_MB = 64
+Base = declarative_base()
+
+
+class Review(Base):
+    __tablename__ = "reviews"
+
+    id = Column(Integer, primary_key=True)
+    rating = Column(Integer)
+    author = Column(String(50))
+    comment = Column(Text)
+    created_at = Column(DateTime)
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc)"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+
+
+def build_table(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        batch = 50_000
+        for start in range(0, ROWS, batch):
+            connection.execute(insert(Review), [
+                {"id": i, "rating": i % 5 + 1, "author": f"user_{i % 1000}",
+                 "comment": "Чудова няня, рекомендую! " * 4, "created_at": None}
+                for i in range(start, min(start + batch, ROWS))
+            ])
+        connection.execute(Review.__table__.update().values(created_at=func.current_timestamp()))
+
+
+def stream(engine, info, export_format):
+    """Consume the export like a client would; returns (bytes, highest RSS seen)"""
+    with Session(engine) as db:
+        size = 0
+        highest = rss_mb()
+        for chunk in TableService(db).stream_rows(info, {}, None, export_format):
+            size += len(chunk)
+            highest = max(highest, rss_mb())
+        return size, highest
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/export.db")
+        build_table(engine)
+        info = TableInfo("reviews", Review)
+
+        baseline = rss_mb()
+        print(f"rows: {ROWS:,}  baseline RSS: {baseline:.0f} MB")
+
+        for export_format in ("ndjson", "csv"):
+            started = time.perf_counter()
+            size, highest = stream(engine, info, export_format)
+            growth = highest - baseline
+            print(f"{export_format:7s} {size / 1e6:8.0f} MB streamed in {time.perf_counter() - started:5.1f}s, "
+                  f"peak RSS growth {growth:.0f} MB")
+            assert growth < MAX_STREAM_GROWTH_MB, f"{export_format} export grew RSS by {growth:.0f} MB"
+
+        with Session(engine) as db:
+            materialized = [info.serializer(row) for row in db.execute(select(*info.table.columns))]
+        print(f"materialized list of {len(materialized):,} dicts: RSS growth {rss_mb() - baseline:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
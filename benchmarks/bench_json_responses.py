@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rendering large JSON responses
+Compares FastAPI's default path (str()/isoformat() in the serializer, then
+jsonable_encoder and stdlib json) with the orjson default response class
+returned directly (native UUID/datetime, no jsonable_encoder).
+Payloads: a 1,000-row list_rows page and 300 onboarding fields with options.
+Run from the repository root: python benchmarks/bench_json_responses.py
+"""
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.responses import FAST_JSON, FastJSONResponse
+from app.services.serializers import ISO, UUID, get_serializer
+
+BOOKING_COLUMNS = (
+    ("id", UUID), ("parent_id", UUID), ("nanny_id", UUID), ("booking_date", ISO), ("hours", None),
+    ("price", None), ("status", None), ("notes", None), ("is_paid", None),
+    ("created_at", ISO), ("updated_at", ISO)
+)
+Booking = namedtuple("Booking", [name for name, _ in BOOKING_COLUMNS])
+
+
+def booking_rows(count=1_000):
+    now = datetime.now(timezone.utc)
+    return [
+        Booking(uuid.uuid4(), uuid.uuid4(), uuid.uuid4(), date.today(), i % 8, Decimal("250.00"),
+                "confirmed", "Notes " * 10, bool(i % 2), now, now)
+        for i in range(count)
+    ]
+
+
+def onboarding_fields(count=300):
+    return [
+        {
+            "id": str(uuid.uuid4()), "step_id": str(uuid.uuid4()), "field_key": f"field_{i}",
+            "field_type": "multiselect", "label": "Мови, якими ви володієте", "is_required": True,
+            "field_order": i, "validation_rules": {"min_selections": 1, "max_selections": 5},
+            "options": [
+                {"code": f"option_{j}", "label": f"Варіант {j}", "sort_order": j, "is_active": True}
+                for j in range(12)
+            ],
+            "created_at": "2025-01-01T10:00:00+00:00"
+        }
+        for i in range(count)
+    ]
+
+
+def default_path(content):
+    # What FastAPI does for a returned dict/list without a response_model
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(content):
+    return FastJSONResponse(content=content).body
+
+
+def report(name, func):
+    best = min(timeit.repeat(func, number=10, repeat=5)) / 10
+    print(f"  {name:40s} {best * 1000:8.2f} ms")
+    return best
+
+
+def main():
+    print(f"orjson active: {FAST_JSON}")
+    rows = booking_rows()
+    converting = get_serializer(BOOKING_COLUMNS)
+    native = get_serializer(tuple((name, None) for name, _ in BOOKING_COLUMNS))
+
+    print("list_rows, 1,000 bookings rows (serialize + render):")
+    old = report("str()/isoformat + jsonable_encoder + json", lambda: default_path([converting(row) for row in rows]))
+    new = report("native values + FastJSONResponse", lambda: fast_path([native(row) for row in rows]))
+    print(f"  speedup: {old / new:.1f}x")
+
+    fields = onboarding_fields()
+    print("onboarding_fields, 300 fields x 12 options (render):")
+    old = report("jsonable_encoder + json", lambda: default_path(fields))
+    new = report("FastJSONResponse", lambda: fast_path(fields))
+    print(f"  speedup: {old / new:.1f}x")
+
+    assert json.loads(fast_path([native(row) for row in rows[:1]]))[0]["id"] == str(rows[0].id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login latency under concurrent load, bcrypt inline vs worker pool
+Simulates one uvicorn worker: bursts of concurrent logins (password verify)
+while light requests keep arriving, and reports p50/p99 for both kinds.
+Inline verification blocks the event loop, so every other request waits
+behind it; the pool keeps the loop free.
+Run from the repository root: python benchmarks/bench_login_latency.py
+(PASSWORD_BCRYPT_ROUNDS, default 10 here, sets the cost)
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "10")
+
+import bcrypt
+
+from app.services.password_hasher import PasswordHasher
+
+LOGINS = 40
+LIGHT_REQUESTS = 200
+LIGHT_INTERVAL = 0.005
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(verify):
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(int(os.environ["PASSWORD_BCRYPT_ROUNDS"]))).decode()
+    login_latencies, light_latencies = [], []
+
+    # Latency is measured from the scheduled arrival time, so time spent
+    # waiting for a blocked event loop counts
+    async def login(arrived):
+        assert await verify(PASSWORD, hashed)
+        login_latencies.append(time.perf_counter() - arrived)
+
+    async def light(arrived):
+        await asyncio.sleep(0)  # e.g. a cached read
+        light_latencies.append(time.perf_counter() - arrived)
+
+    async def light_stream():
+        tasks = []
+        for index in range(LIGHT_REQUESTS):
+            arrival = started + index * LIGHT_INTERVAL
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            tasks.append(asyncio.create_task(light(arrival)))
+        await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    await asyncio.gather(light_stream(), *(login(started) for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    return login_latencies, light_latencies, elapsed
+
+
+async def inline_verify(password, hashed):
+    # What the handlers did before: bcrypt straight on the event loop
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+def report(name, result):
+    logins, lights, elapsed = result
+    print(f"{name}")
+    print(f"  login  p50 {statistics.median(logins) * 1000:8.1f} ms   p99 {percentile(logins, 0.99) * 1000:8.1f} ms")
+    print(f"  light  p50 {statistics.median(lights) * 1000:8.1f} ms   p99 {percentile(lights, 0.99) * 1000:8.1f} ms")
+    print(f"  wall {elapsed:.2f} s")
+
+
+def main():
+    print(f"{LOGINS} concurrent logins + {LIGHT_REQUESTS} light requests, "
+          f"bcrypt rounds {os.environ['PASSWORD_BCRYPT_ROUNDS']}, {os.cpu_count()} CPU(s)")
+    report("inline bcrypt (event loop)", asyncio.run(run(inline_verify)))
+    hasher = PasswordHasher(rounds=int(os.environ["PASSWORD_BCRYPT_ROUNDS"]), workers=min(4, os.cpu_count() or 1))
+    report(f"worker pool ({hasher.workers} threads)", asyncio.run(run(hasher.verify)))
+    print(f"  pool stats: {hasher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: send-otp latency, inline SMS vs background dispatch queue
+Uses the local (offline) SMS provider with simulated latency and failures:
+500 OTP requests arrive at 250/s; inline sending makes every request wait for
+the provider (and fail with it), the dispatcher answers after enqueueing and
+delivers in the background with retries.
+Run from the repository root: python benchmarks/bench_otp_dispatch.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.otp_dispatch import LocalSmsProvider, OtpDispatcher
+
+logging.getLogger("app.services.otp_dispatch").setLevel(logging.ERROR)
+
+REQUESTS = 500
+RATE = 250.0
+LATENCY_MS = 300.0
+FAILURE_RATE = 0.1
+CONCURRENCY = 20
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000
+
+
+async def load(handler):
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+
+    async def one(i):
+        nonlocal errors
+        scheduled = start + i / RATE
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        try:
+            await handler(f"+38050{i:07d}")
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - scheduled)
+
+    await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+    return latencies, errors
+
+
+def report(name, latencies, errors):
+    print(f"  {name:28s} p50 {percentile(latencies, 0.5):8.1f} ms  p99 {percentile(latencies, 0.99):8.1f} ms"
+          f"  errors {errors}")
+
+
+async def main():
+    output = tempfile.NamedTemporaryFile(suffix=".sms", delete=False).name
+    print(f"{REQUESTS} requests at {RATE:.0f}/s, provider {LATENCY_MS:.0f} ms, "
+          f"{FAILURE_RATE:.0%} failures, {CONCURRENCY} concurrent sends")
+
+    provider = LocalSmsProvider(output, CONCURRENCY, LATENCY_MS, FAILURE_RATE)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def inline(phone):
+        async with semaphore:
+            await provider.send(phone, "login", "123456")
+
+    report("inline send", *await load(inline))
+
+    dispatcher = OtpDispatcher(
+        LocalSmsProvider(output, CONCURRENCY, LATENCY_MS, FAILURE_RATE),
+        workers=CONCURRENCY, max_attempts=5, backoff_base=0.1
+    )
+
+    async def enqueue(phone):
+        dispatcher.enqueue(phone, "login", "123456")
+
+    started = time.perf_counter()
+    report("dispatcher enqueue", *await load(enqueue))
+    await dispatcher.stop(drain_timeout=60)
+    stats = dispatcher.stats()
+    print(f"  background delivery: {stats['sent']} sent, {stats['retried']} retries, {stats['failed']} failed "
+          f"in {time.perf_counter() - started:.1f} s (avg {stats['avg_delivery_ms']} ms after enqueue)")
+
+    os.unlink(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
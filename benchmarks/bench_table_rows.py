@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: generic table endpoint row conversion for 1,000-row responses
+Compares the per-request model map + getattr/hasattr('isoformat') loop with the
+startup-built TableInfo (column select + precompiled serializer), and a
+`select=id,status,booking_date` projection through TableService.list_rows.
+Uses an in-memory SQLite table shaped like `bookings`.
+Run from the repository root: python benchmarks/bench_table_rows.py
+"""
+from datetime import date, datetime, timezone
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, Numeric, String, Text, Uuid, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.services.table_registry import TableInfo
+from app.services.table_service import TableService
+
+ROWS = 1_000
+Base = declarative_base()
+
+
+class Booking(Base):
+    __tablename__ = "bookings"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    parent_id = Column(Uuid, nullable=False)
+    nanny_id = Column(Uuid, nullable=False)
+    booking_date = Column(Date)
+    hours = Column(Integer)
+    price = Column(Numeric(10, 2))
+    status = Column(String(20))
+    notes = Column(Text)
+    is_paid = Column(Boolean)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+def legacy_request(db: Session):
+    # What list_rows did on every request before the registry
+    table_map = {"bookings": Booking}
+    model = table_map["bookings"]
+    results = db.query(model).limit(ROWS).all()
+    data = []
+    for item in results:
+        item_dict = {}
+        for column in item.__table__.columns:
+            value = getattr(item, column.name)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            item_dict[column.name] = value
+        data.append(item_dict)
+    db.expunge_all()
+    return data
+
+
+def registry_request(db: Session, info: TableInfo):
+    serializer = info.serializer
+    return [serializer(row) for row in db.execute(select(*info.table.columns).limit(ROWS))]
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        db.add_all(
+            Booking(parent_id=uuid.uuid4(), nanny_id=uuid.uuid4(), booking_date=date.today(), hours=i % 8,
+                    price=100, status="confirmed", notes="Notes " * 10, is_paid=bool(i % 2),
+                    created_at=now, updated_at=now)
+            for i in range(ROWS)
+        )
+        db.commit()
+
+        info = TableInfo("bookings", Booking)
+        service = TableService(db)
+        for name, func in (("per-request map", lambda: legacy_request(db)),
+                           ("startup registry", lambda: registry_request(db, info)),
+                           ("select projection", lambda: service.list_rows(info, {}, limit=ROWS,
+                                                                          select_param="id,status,booking_date"))):
+            best = min(timeit.repeat(func, number=10, repeat=5)) / 10
+            print(f"{name:18s} {best * 1000:8.2f} ms per {ROWS}-row response  ({best * 1e6 / ROWS:.2f} us/row)")
+
+
+if __name__ == "__main__":
+    main()
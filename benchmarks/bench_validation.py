@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: onboarding answer validation throughput
+Compares validators compiled once per config version with rebuilding them
+(JSON parsing + regex compilation) on every request.
+Run from the repository root: python benchmarks/bench_validation.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.onboarding_validation import ConfigValidator, compile_field_validator
+
+ANSWERS = 100_000
+
+FIELDS = [
+    {"field_key": "first_name", "field_type": "text", "is_required": True,
+     "validation_rules": json.dumps({"min_length": 2, "max_length": 50})},
+    {"field_key": "email", "field_type": "email", "is_required": True, "validation_rules": None},
+    {"field_key": "phone", "field_type": "phone", "is_required": True, "validation_rules": None},
+    {"field_key": "postcode", "field_type": "text", "is_required": False,
+     "validation_rules": json.dumps({"pattern": r"^\d{5}$"})},
+    {"field_key": "experience_years", "field_type": "number", "is_required": True,
+     "validation_rules": json.dumps({"min": 0, "max": 60})},
+    {"field_key": "services", "field_type": "multiselect", "is_required": True,
+     "reference_category_code": "services",
+     "validation_rules": json.dumps({"min_selections": 1, "max_selections": 5})},
+]
+REFERENCE_VALUES = {"services": {f"service_{i}" for i in range(20)}}
+
+ANSWER_SAMPLES = [
+    {"step_key": "personal", "field_key": "first_name", "text_value": "Olena", "is_completed": True},
+    {"step_key": "personal", "field_key": "email", "text_value": "olena@example.com"},
+    {"step_key": "personal", "field_key": "phone", "text_value": "+380 67 123 4567"},
+    {"step_key": "personal", "field_key": "postcode", "text_value": "0100"},
+    {"step_key": "personal", "field_key": "experience_years", "number_value": 7},
+    {"step_key": "personal", "field_key": "services", "json_value": ["service_1", "service_3"]},
+]
+
+
+def build_config_validator():
+    return ConfigValidator("config", 1, {
+        ("personal", field["field_key"]): compile_field_validator(field, REFERENCE_VALUES)
+        for field in FIELDS
+    })
+
+
+def run_compiled():
+    validator = build_config_validator()
+    for i in range(ANSWERS):
+        validator.validate(ANSWER_SAMPLES[i % len(ANSWER_SAMPLES)])
+
+
+def run_rebuilt():
+    for i in range(ANSWERS):
+        build_config_validator().validate(ANSWER_SAMPLES[i % len(ANSWER_SAMPLES)])
+
+
+def main():
+    for name, func in (("compiled once", run_compiled), ("rebuilt per request", run_rebuilt)):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        print(f"{name:20s} {ANSWERS / elapsed:12,.0f} answers/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+-- Keyset pagination / incremental sync of user onboarding answers
+-- Serves: WHERE user_id = ? [AND updated_at > ?] ORDER BY updated_at, id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_onboarding_data_user_updated
+    ON user_onboarding_data (user_id, updated_at, id);
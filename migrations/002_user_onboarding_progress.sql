@@ -0,0 +1,13 @@
+-- Materialized onboarding progress, refreshed inside every answer save
+CREATE TABLE IF NOT EXISTS user_onboarding_progress (
+    user_id UUID NOT NULL,
+    config_id UUID NOT NULL,
+    steps_total INTEGER NOT NULL DEFAULT 0,
+    steps_completed INTEGER NOT NULL DEFAULT 0,
+    required_fields_total INTEGER NOT NULL DEFAULT 0,
+    required_fields_remaining INTEGER NOT NULL DEFAULT 0,
+    percent INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, config_id),
+    FOREIGN KEY (config_id) REFERENCES onboarding_configs(id)
+);
@@ -0,0 +1,19 @@
+-- OTP codes and send log for the Postgres OTP store (OTP_STORE=postgres)
+-- UNLOGGED: short-lived rows, no WAL traffic; losing them on a crash only voids pending codes
+CREATE UNLOGGED TABLE IF NOT EXISTS otp_codes (
+    phone VARCHAR(32) NOT NULL,
+    purpose VARCHAR(32) NOT NULL,
+    code_hash BYTEA,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (phone, purpose)
+);
+
+CREATE INDEX IF NOT EXISTS idx_otp_codes_expires_at ON otp_codes (expires_at);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS otp_sends (
+    phone VARCHAR(32) NOT NULL,
+    sent_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_otp_sends_phone_sent_at ON otp_sends (phone, sent_at);
@@ -0,0 +1,66 @@
+"""
+Tests for the principal cache
+"""
+import dataclasses
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import auth_cache
+from app.services.auth_cache import (
+    Principal, get_principal, invalidate_principals, principal_version, store_principal
+)
+
+USER_ID = "0b6f8f3e-5d1c-4f0e-8a1e-3c2b1a0f9e77"
+
+
+def _profile(**values):
+    return SimpleNamespace(**{
+        "user_id": USER_ID, "phone": "+380501112233", "email": "anna@example.com",
+        "first_name": "Анна", "last_name": "Коваль", "password_hash": "$2b$12$hash",
+        "created_at": datetime(2024, 5, 1), **values
+    })
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    auth_cache.principal_cache.invalidate()
+    auth_cache._versions.clear()
+    yield
+    auth_cache.principal_cache.invalidate()
+    auth_cache._versions.clear()
+
+
+def test_cached_principal_is_read_only_snapshot():
+    profile = _profile()
+    store_principal(USER_ID, principal_version(USER_ID), Principal.from_profile(profile))
+    profile.first_name = "Changed"
+
+    found, principal = get_principal(USER_ID)
+    assert found
+    assert principal.first_name == "Анна"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        principal.first_name = "Changed"
+
+
+def test_lookup_racing_an_invalidation_is_not_cached():
+    version = principal_version(USER_ID)
+    invalidate_principals([USER_ID])
+    store_principal(USER_ID, version, Principal.from_profile(_profile()))
+
+    assert get_principal(USER_ID) == (False, None)
+
+
+def test_versions_are_pruned_after_the_principal_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now[0])
+
+    invalidate_principals(f"user-{i}" for i in range(100))
+    assert len(auth_cache._versions) == 100
+
+    now[0] += auth_cache.principal_cache.ttl_seconds + 1
+    invalidate_principals([USER_ID])
+
+    assert list(auth_cache._versions) == [USER_ID]
+    assert principal_version("user-0") == 0
@@ -0,0 +1,49 @@
+"""
+Tests for POST /api/v1/auth/send-otp when the dispatch queue is full
+"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.routers import auth
+from app.services.otp_dispatch import LocalSmsProvider, OtpDispatcher
+from app.services.otp_store import MemoryOtpStore
+
+PHONE = "+380501112233"
+
+
+def test_full_queue_keeps_previous_code_and_send_window(tmp_path, monkeypatch):
+    dispatcher = OtpDispatcher(LocalSmsProvider(str(tmp_path / "sms.txt")), workers=1, max_queue=1)
+    store = MemoryOtpStore(b"test-secret", send_limit=2, send_interval_seconds=0)
+    monkeypatch.setattr(auth, "otp_dispatcher", dispatcher)
+    monkeypatch.setattr(auth, "otp_store", store)
+
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    async def scenario():
+        previous_code = await store.issue(PHONE, "login")
+        held = dispatcher.reserve()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for _ in range(3):
+                response = await client.post("/api/v1/auth/send-otp", json={"phone": PHONE, "purpose": "login"})
+                assert response.status_code == 503
+                assert response.headers["Retry-After"] == "5"
+
+            held.release()
+            response = await client.post(
+                "/api/v1/auth/verify-otp", json={"phone": PHONE, "code": previous_code, "purpose": "login"}
+            )
+            assert response.status_code == 200
+
+            # Only the first issue counted: one more send still fits the window of two
+            response = await client.post("/api/v1/auth/send-otp", json={"phone": PHONE, "purpose": "login"})
+            assert response.status_code == 200
+
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert store.stats()["issued"] == 2
+    assert store.stats()["rate_limited"] == 0
@@ -0,0 +1,53 @@
+"""
+Tests for ETag revalidation of GET /api/v1/onboarding_steps
+"""
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.async_database import get_async_db
+from app.routers import onboarding
+
+
+class _MetadataSession:
+    """AsyncSession stand-in: `version_row` is what the metadata stamp query sees"""
+
+    def __init__(self):
+        self.version_row = (1, 1, "2024-05-01", "steps-digest-1", 3, "2024-05-01")
+
+    async def execute(self, statement, params=None):
+        return SimpleNamespace(fetchone=lambda: self.version_row, fetchall=lambda: [])
+
+
+def _client(session):
+    app = FastAPI()
+    app.include_router(onboarding.router)
+
+    async def db():
+        yield session
+
+    app.dependency_overrides[get_async_db] = db
+    return TestClient(app)
+
+
+def test_matching_etag_returns_304():
+    client = _client(_MetadataSession())
+    etag = client.get("/api/v1/onboarding_steps").headers["ETag"]
+
+    response = client.get("/api/v1/onboarding_steps", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_step_edit_changes_etag_immediately():
+    session = _MetadataSession()
+    client = _client(session)
+    etag = client.get("/api/v1/onboarding_steps").headers["ETag"]
+
+    # A step was edited in place: same counts and timestamps, different row contents
+    session.version_row = (1, 1, "2024-05-01", "steps-digest-2", 3, "2024-05-01")
+    response = client.get("/api/v1/onboarding_steps", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,89 @@
+"""
+Tests for GET /api/v1/onboarding/progress and /onboarding/progress/{config_id}
+"""
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.async_database import get_async_db
+from app.routers import onboarding
+from app.routers.auth import get_current_user_id, require_admin
+
+
+class _EmptyResult:
+    def fetchone(self):
+        return None
+
+    def first(self):
+        return None
+
+
+    def fetchall(self):
+        return []
+
+
+class _NoRowsSession:
+    """AsyncSession stand-in where no progress row and no config exist"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return _EmptyResult()
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+def _client(session):
+    app = FastAPI()
+    app.include_router(onboarding.router)
+
+    async def db():
+        yield session
+
+    app.dependency_overrides[get_async_db] = db
+    app.dependency_overrides[get_current_user_id] = lambda: str(uuid.uuid4())
+    app.dependency_overrides[require_admin] = lambda: object()
+    return TestClient(app)
+
+
+def test_unknown_config_returns_404_without_computing_progress():
+    session = _NoRowsSession()
+    response = _client(session).get(f"/api/v1/onboarding/progress/{uuid.uuid4()}")
+
+    assert response.status_code == 404
+    assert session.commits == 0
+    assert not any("INSERT INTO user_onboarding_progress" in statement for statement in session.statements)
+
+
+def test_non_uuid_config_id_is_rejected():
+    session = _NoRowsSession()
+    response = _client(session).get("/api/v1/onboarding/progress/not-a-uuid")
+
+    assert response.status_code == 422
+    assert session.statements == []
+
+
+def test_bulk_progress_rejects_non_uuid_user_ids():
+    session = _NoRowsSession()
+    response = _client(session).get("/api/v1/onboarding/progress", params={"user_ids": f"{uuid.uuid4()},abc"})
+
+    assert response.status_code == 400
+    assert session.statements == []
+
+
+def test_bulk_progress_accepts_uuid_user_ids():
+    session = _NoRowsSession()
+    response = _client(session).get(
+        "/api/v1/onboarding/progress", params={"user_ids": f"{uuid.uuid4()}, {uuid.uuid4()}"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == []
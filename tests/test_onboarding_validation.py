@@ -0,0 +1,194 @@
+"""
+Tests for answer value coercion before onboarding upserts
+"""
+import asyncio
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.async_database import get_async_db
+from app.routers import onboarding
+from app.routers.auth import get_current_user
+from app.services.onboarding_service import OnboardingService, onboarding_cache
+from app.services.onboarding_validation import ConfigValidator, OnboardingValidationError, coerce_answer
+from app.services.reference_service import ReferenceService
+
+CONFIG_ID = "6f1c2f9e-1b7a-4c55-9d57-2f1f5d3f0a11"
+USER_ID = "0b6f8f3e-5d1c-4f0e-8a1e-3c2b1a0f9e77"
+
+
+class _RecordingSession:
+    """AsyncSession stand-in that records the bound parameters"""
+
+    def __init__(self):
+        self.params = []
+
+    async def execute(self, statement, params=None):
+        self.params.append(params)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    async def no_rules(self, config_id):
+        return ConfigValidator(config_id, 1, {})
+
+    monkeypatch.setattr(OnboardingService, "get_config_validator", no_rules)
+    return OnboardingService(_RecordingSession())
+
+
+def _item(**values):
+    return {"config_id": CONFIG_ID, "step_key": "personal", "field_key": "answer", **values}
+
+
+def test_coerce_string_number():
+    data = {"number_value": " 5.5 "}
+    assert coerce_answer(data) is None
+    assert data["number_value"] == Decimal("5.5")
+
+    assert coerce_answer({"number_value": "five"}) == "Очікується число"
+    assert coerce_answer({"number_value": True}) == "Очікується число"
+
+
+def test_coerce_string_boolean():
+    data = {"boolean_value": "true"}
+    assert coerce_answer(data) is None
+    assert data["boolean_value"] is True
+
+    data = {"boolean_value": "0"}
+    assert coerce_answer(data) is None
+    assert data["boolean_value"] is False
+
+    assert coerce_answer({"boolean_value": "maybe"}) == "Очікується логічне значення"
+
+
+def test_coerce_bad_date():
+    data = {"date_value": "2024-05-17T10:00:00"}
+    assert coerce_answer(data) is None
+    assert data["date_value"] == date(2024, 5, 17)
+
+    assert coerce_answer({"date_value": "2024-13-45"}).startswith("Невірна дата")
+    assert coerce_answer({"time_value": "25:99"}).startswith("Невірний час")
+
+
+def test_batch_binds_coerced_values(service):
+    result = asyncio.run(service.save_user_data_batch(USER_ID, [
+        _item(field_key="years", number_value="5"),
+        _item(field_key="smoker", boolean_value="false"),
+    ]))
+
+    assert result == {"success": True, "saved": 2, "errors": []}
+    params = service.db.params[0]
+    assert {params["number_value_0"], params["boolean_value_1"]} == {Decimal("5"), False}
+
+
+def test_batch_reports_unconvertible_values_per_field(service):
+    result = asyncio.run(service.save_user_data_batch(USER_ID, [
+        _item(field_key="years", number_value="many"),
+        _item(field_key="smoker", boolean_value="sometimes"),
+        _item(field_key="birthday", date_value="2024-13-45"),
+    ]))
+
+    assert result["saved"] == 0
+    assert [error["field_key"] for error in result["errors"]] == ["years", "smoker", "birthday"]
+    assert service.db.params == []
+
+
+def test_batch_reports_malformed_config_id_per_item(service):
+    result = asyncio.run(service.save_user_data_batch(USER_ID, [
+        _item(field_key="years", number_value="5"),
+        _item(field_key="smoker", config_id="not-a-uuid", boolean_value="false"),
+    ]))
+
+    assert result["saved"] == 1
+    assert result["errors"] == [{"index": 1, "field_key": "smoker", "error": "Invalid config_id"}]
+    assert service.db.params[0]["config_id_0"] == CONFIG_ID
+
+
+def test_batch_resolves_each_config_validator_once(service, monkeypatch):
+    lookups = []
+
+    async def counting(self, config_id):
+        lookups.append(config_id)
+        return ConfigValidator(config_id, 1, {})
+
+    monkeypatch.setattr(OnboardingService, "get_config_validator", counting)
+    result = asyncio.run(service.save_user_data_batch(USER_ID, [
+        _item(field_key="years", number_value="5"),
+        _item(field_key="smoker", boolean_value="false"),
+        _item(field_key="pets", text_value="cat"),
+    ]))
+
+    assert result["saved"] == 3
+    assert lookups == [CONFIG_ID]
+
+
+class _ConfigSession:
+    """AsyncSession stand-in for one config without fields at a given version"""
+
+    def __init__(self, version):
+        self.version = version
+
+    async def execute(self, statement, params=None):
+        return SimpleNamespace(scalar=lambda: self.version, fetchall=lambda: [])
+
+
+def test_validator_cache_follows_config_version(monkeypatch):
+    async def reference_version(self):
+        return "refs-1"
+
+    async def no_categories(self, codes):
+        list(codes)
+        return {}
+
+    monkeypatch.setattr(ReferenceService, "get_version", reference_version)
+    monkeypatch.setattr(ReferenceService, "resolve_categories", no_categories)
+    onboarding_cache.invalidate()
+    session = _ConfigSession(1)
+    service = OnboardingService(session)
+
+    first = asyncio.run(service.get_config_validator(CONFIG_ID))
+    assert asyncio.run(service.get_config_validator(CONFIG_ID)) is first
+
+    session.version = 2
+    republished = asyncio.run(service.get_config_validator(CONFIG_ID))
+    assert republished is not first
+    assert republished.version == 2
+    onboarding_cache.invalidate()
+
+
+def test_single_upsert_rejects_bad_date(service):
+    with pytest.raises(OnboardingValidationError) as error:
+        asyncio.run(service.save_user_data(USER_ID, _item(date_value="not-a-date")))
+
+    assert error.value.errors[0]["field_key"] == "answer"
+    assert service.db.params == []
+
+
+def test_batch_route_returns_400_for_bad_values(service):
+    app = FastAPI()
+    app.include_router(onboarding.router)
+
+    async def db():
+        yield _RecordingSession()
+
+    app.dependency_overrides[get_async_db] = db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=USER_ID)
+
+    response = TestClient(app).post("/api/v1/onboarding/user-data/batch", json={
+        "config_id": CONFIG_ID,
+        "step_key": "personal",
+        "fields": [{"field_key": "birthday", "date_value": "2024-13-45"}]
+    })
+
+    assert response.status_code == 400
+    assert response.json()["detail"][0]["field_key"] == "birthday"
@@ -0,0 +1,66 @@
+"""
+Tests for the OTP dispatch queue capacity API
+"""
+import asyncio
+
+import pytest
+
+from app.services.otp_dispatch import LocalSmsProvider, OtpDispatcher, OtpQueueFull, SmsProvider
+
+
+def _dispatcher(tmp_path, max_queue):
+    return OtpDispatcher(LocalSmsProvider(str(tmp_path / "sms.txt")), workers=1, max_queue=max_queue)
+
+
+def test_reserve_fails_before_side_effects_when_full(tmp_path):
+    async def scenario():
+        dispatcher = _dispatcher(tmp_path, max_queue=1)
+        held = dispatcher.reserve()
+        assert not dispatcher.has_capacity()
+
+        side_effects = []
+        with pytest.raises(OtpQueueFull):
+            with dispatcher.reserve():
+                side_effects.append("issued")
+
+        assert side_effects == []
+        assert dispatcher.stats()["rejected"] == 1
+        held.release()
+        assert dispatcher.has_capacity()
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_unused_slot_is_returned(tmp_path):
+    async def scenario():
+        dispatcher = _dispatcher(tmp_path, max_queue=1)
+        with pytest.raises(RuntimeError):
+            with dispatcher.reserve():
+                raise RuntimeError("rate limited")
+
+        assert dispatcher.stats()["reserved"] == 0
+        dispatcher.enqueue("+380501112233", "login", "123456")
+        await dispatcher.stop()
+        assert dispatcher.sent == 1
+
+    asyncio.run(scenario())
+
+
+def test_slot_enqueue_delivers(tmp_path):
+    async def scenario():
+        dispatcher = _dispatcher(tmp_path, max_queue=2)
+        with dispatcher.reserve() as slot:
+            slot.enqueue("+380501112233", "login", "654321")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert (tmp_path / "sms.txt").read_text().split()[-1] == "654321"
+
+
+def test_provider_must_implement_send():
+    class Incomplete(SmsProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
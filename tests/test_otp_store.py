@@ -0,0 +1,47 @@
+"""
+Tests for the OTP store
+"""
+import asyncio
+
+import pytest
+
+from app.services.otp_store import MemoryOtpStore, OtpRateLimited, OtpStore
+
+PHONE = "+380501112233"
+
+
+def test_store_must_implement_issue_and_verify():
+    class Incomplete(OtpStore):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete(b"secret")
+
+
+def test_memory_store_verifies_once_and_limits_attempts():
+    async def scenario():
+        store = MemoryOtpStore(b"secret", max_attempts=2, send_interval_seconds=0)
+        code = await store.issue(PHONE, "login")
+        assert not await store.verify(PHONE, "login", "bad")
+        assert await store.verify(PHONE, "login", code)
+        assert not await store.verify(PHONE, "login", code)
+
+        code = await store.issue(PHONE, "login")
+        assert not await store.verify(PHONE, "login", "bad")
+        assert not await store.verify(PHONE, "login", "bad")
+        assert not await store.verify(PHONE, "login", code)
+        assert store.stats()["locked_out"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_send_window():
+    async def scenario():
+        store = MemoryOtpStore(b"secret", send_limit=2, send_interval_seconds=0)
+        await store.issue(PHONE, "login")
+        await store.issue(PHONE, "login")
+        with pytest.raises(OtpRateLimited) as error:
+            await store.issue(PHONE, "login")
+        assert error.value.retry_after > 0
+
+    asyncio.run(scenario())
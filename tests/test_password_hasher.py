@@ -0,0 +1,71 @@
+"""
+Tests for password hashing limits
+"""
+import asyncio
+from types import SimpleNamespace
+
+import bcrypt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.async_database import get_async_db
+from app.routers import auth
+from app.services.password_hasher import MAX_PASSWORD_BYTES, PasswordHasher, PasswordTooLong
+
+# 2-byte UTF-8 characters: 37 of them are 74 bytes but only 37 characters
+LONG_PASSWORD = "ї" * 37
+
+
+def test_password_over_72_bytes_is_rejected_before_the_pool():
+    hasher = PasswordHasher(rounds=4, workers=1)
+
+    with pytest.raises(PasswordTooLong):
+        asyncio.run(hasher.hash(LONG_PASSWORD))
+
+    assert hasher.stats()["completed"] == 0
+
+
+def test_password_of_72_bytes_hashes_and_verifies():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    password = "a" * MAX_PASSWORD_BYTES
+
+    hashed = asyncio.run(hasher.hash(password))
+
+    assert asyncio.run(hasher.verify(password, hashed))
+
+
+class _NoopSession:
+    async def execute(self, statement, params=None):
+        raise AssertionError("password must not be stored")
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_update_password_route_returns_400_for_long_password(monkeypatch):
+    monkeypatch.setattr(auth, "password_hasher", PasswordHasher(rounds=4, workers=1))
+    current_user = SimpleNamespace(
+        user_id="0b6f8f3e-5d1c-4f0e-8a1e-3c2b1a0f9e77",
+        password_hash=bcrypt.hashpw(b"old-password", bcrypt.gensalt(4)).decode("ascii")
+    )
+
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    async def db():
+        yield _NoopSession()
+
+    app.dependency_overrides[get_async_db] = db
+    app.dependency_overrides[auth.get_current_user] = lambda: current_user
+
+    response = TestClient(app).post("/api/v1/auth/update-password", json={
+        "current_password": "old-password",
+        "new_password": LONG_PASSWORD
+    })
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Пароль задовгий")
@@ -0,0 +1,114 @@
+"""
+Tests for streaming table exports (TableService.stream_rows)
+"""
+import csv
+import io
+import json
+import resource
+
+import pytest
+from sqlalchemy import Column, Integer, String, Text, create_engine, insert
+from sqlalchemy.orm import Session, declarative_base
+
+from app.services.table_registry import TableInfo
+from app.services.table_service import TableService
+
+LARGE_ROWS = 200_000
+MAX_STREAM_GROWTH_MB = 32
+Base = declarative_base()
+
+
+class Review(Base):
+    __tablename__ = "reviews"
+
+    id = Column(Integer, primary_key=True)
+    rating = Column(Integer)
+    author = Column(String(50))
+    comment = Column(Text)
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux /proc)"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+
+
+def _engine(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Review), rows)
+    return engine
+
+
+def _export(engine, params, export_format, order_by="id"):
+    info = TableInfo("reviews", Review)
+    with Session(engine) as db:
+        conditions = TableService.parse_filters(info, params)
+        chunks = list(TableService(db).stream_rows(info, conditions, order_by, export_format))
+    return b"".join(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8") for chunk in chunks)
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    return _engine(tmp_path / "small.db", [
+        {"id": 1, "rating": 5, "author": "Анна", "comment": 'Каже "дуже добре", рекомендую'},
+        {"id": 2, "rating": 2, "author": "Олег", "comment": "перший рядок\nдругий, з комою"},
+        {"id": 3, "rating": 4, "author": "Ірина", "comment": None},
+    ])
+
+
+def test_ndjson_export_applies_filters(small_engine):
+    lines = _export(small_engine, [("rating", "gte.4")], "ndjson").decode("utf-8").splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "rating": 5, "author": "Анна", "comment": 'Каже "дуже добре", рекомендую'},
+        {"id": 3, "rating": 4, "author": "Ірина", "comment": None},
+    ]
+
+
+def test_csv_export_has_header_and_quotes_values(small_engine):
+    text = _export(small_engine, [], "csv").decode("utf-8")
+
+    assert text.startswith("id,rating,author,comment\r\n")
+    assert '"Каже ""дуже добре"", рекомендую"' in text
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[1:] == [
+        ["1", "5", "Анна", 'Каже "дуже добре", рекомендую'],
+        ["2", "2", "Олег", "перший рядок\nдругий, з комою"],
+        ["3", "4", "Ірина", ""],
+    ]
+
+
+def test_csv_export_applies_filters(small_engine):
+    rows = list(csv.reader(io.StringIO(_export(small_engine, [("author", "ilike.*ег*")], "csv").decode("utf-8"))))
+
+    assert rows == [["id", "rating", "author", "comment"], ["2", "2", "Олег", "перший рядок\nдругий, з комою"]]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_large_export_keeps_rss_flat(tmp_path, export_format):
+    engine = create_engine(f"sqlite:///{tmp_path / 'large.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for start in range(0, LARGE_ROWS, 50_000):
+            connection.execute(insert(Review), [
+                {"id": i, "rating": i % 5 + 1, "author": f"user_{i % 1000}", "comment": "Чудова няня, рекомендую! " * 4}
+                for i in range(start, start + 50_000)
+            ])
+
+    info = TableInfo("reviews", Review)
+    baseline = _rss_mb()
+    highest = baseline
+    size = 0
+    rows = 0
+    with Session(engine) as db:
+        for chunk in TableService(db).stream_rows(info, [], None, export_format):
+            size += len(chunk)
+            rows += chunk.count(b"\n" if isinstance(chunk, bytes) else "\r\n")
+            highest = max(highest, _rss_mb())
+
+    # 200k rows are 25+ MB of output; materializing them would grow RSS well past the limit
+    assert size > 20_000_000
+    assert rows == LARGE_ROWS + (export_format == "csv")
+    assert highest - baseline < MAX_STREAM_GROWTH_MB
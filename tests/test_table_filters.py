@@ -0,0 +1,40 @@
+"""
+Tests for query-string filter parsing in TableService
+"""
+import pytest
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+
+from app.services.table_registry import TableInfo
+from app.services.table_service import TableQueryError, TableService
+
+Base = declarative_base()
+
+
+class Child(Base):
+    __tablename__ = "children"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    age = Column(Integer)
+
+
+@pytest.fixture
+def info():
+    return TableInfo("children", Child)
+
+
+@pytest.mark.parametrize("operator", ["like", "ilike"])
+def test_like_on_non_text_column_is_rejected(info, operator):
+    with pytest.raises(TableQueryError):
+        TableService.parse_filters(info, [("age", f"{operator}.3*")])
+
+
+def test_like_on_text_column_uses_sql_wildcards(info):
+    (condition,) = TableService.parse_filters(info, [("name", "ilike.*anna*")])
+    assert condition.right.value == "%anna%"
+
+
+def test_invalid_value_is_rejected(info):
+    with pytest.raises(TableQueryError):
+        TableService.parse_filters(info, [("age", "gte.three")])